@@ -0,0 +1,28 @@
+"""Liveness and readiness probes."""
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+@router.get("/live")
+async def live():
+    """The process is up and the event loop is responsive."""
+    return {"status": "alive"}
+
+
+@router.get("/ready")
+async def ready():
+    """Whether warmup has finished, with connection pool statistics."""
+    from app.db import pool_stats
+    from app.db.warmup import readiness
+
+    body = {
+        "status": "ready" if readiness.ready else "warming_up",
+        "stage": readiness.stage,
+        "pool": pool_stats.stats(),
+    }
+    if readiness.error:
+        body["error"] = readiness.error
+    return JSONResponse(body, status_code=200 if readiness.ready else 503)
@@ -0,0 +1,101 @@
+"""Custom route class applying per-request database deadlines."""
+
+import asyncio
+from typing import Callable
+
+import pymongo
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from pymongo.errors import PyMongoError
+
+from app.core.config import get_settings
+from app.core.deadline import close_cursors, start_cursor_tracking
+from app.core.fields import Fields
+from app.core.timing import stage
+
+settings = get_settings()
+
+# Only these are cancelled on disconnect; writes run to completion.
+CANCELLABLE_METHODS = {"GET", "HEAD"}
+
+
+class DeadlineRoute(APIRoute):
+    """Run each request under a MongoDB deadline and cancel reads on disconnect.
+
+    ``pymongo.timeout`` sets ``maxTimeMS`` on every Motor operation made while
+    handling the request (dependencies included). The default comes from
+    ``Settings.request_timeout_ms`` and can be overridden per endpoint with
+    ``app.core.deadline.deadline``.
+
+    Writes are never cancelled: a review create spans several updates, and
+    stopping half way would leave derived state behind that a retry then
+    duplicates. They finish under the same deadline and their response is
+    returned as usual (so the idempotency cache records it); the server
+    drops it for the disconnected client.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        timeout_ms = getattr(self.endpoint, "deadline_ms", settings.request_timeout_ms)
+
+        async def deadline_handler(request: Request) -> Response:
+            # Read the body up front so the disconnect watcher below can own
+            # ``receive`` without stealing request body messages.
+            await request.body()
+            cursors = start_cursor_tracking()
+
+            with stage("handler"), pymongo.timeout(timeout_ms / 1000):
+                task = asyncio.ensure_future(handler(request))
+                watcher = asyncio.ensure_future(self._wait_for_disconnect(request))
+                try:
+                    done, _ = await asyncio.wait(
+                        {task, watcher}, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    if task not in done:
+                        if request.method not in CANCELLABLE_METHODS:
+                            return await asyncio.shield(task)
+                        task.cancel()
+                        await close_cursors(cursors)
+                        # Nobody is listening; the status is only for logs.
+                        return Response(status_code=499)
+                    return task.result()
+                except PyMongoError as e:
+                    if e.timeout:
+                        await close_cursors(cursors)
+                        return JSONResponse(
+                            {"detail": "Database operation timed out"},
+                            status_code=504,
+                        )
+                    raise
+                finally:
+                    watcher.cancel()
+
+        return deadline_handler
+
+    @staticmethod
+    async def _wait_for_disconnect(request: Request):
+        while True:
+            message = await request.receive()
+            if message["type"] == "http.disconnect":
+                return
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse that records its rendering time as the ``render`` stage."""
+
+    def render(self, content) -> bytes:
+        with stage("render"):
+            return super().render(content)
+
+
+def fieldset_response(content, fields: Fields):
+    """Return ``content`` as is, or rendered directly for a sparse fieldset.
+
+    Partial models would fail validation against the route's full
+    ``response_model``, so sparse responses bypass it.
+    """
+    if fields is None:
+        return content
+    return TimedJSONResponse(jsonable_encoder(content))
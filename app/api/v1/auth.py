@@ -1,8 +1,11 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, status
 from fastapi.security import (
     HTTPBearer,
     HTTPAuthorizationCredentials,
 )
+from pymongo.errors import PyMongoError
 
 from app.schemas.auth import UserLogin, Token, RefreshTokenRevoke
 from app.schemas.user import UserRead
@@ -16,9 +19,13 @@ from app.services.auth_service import (
     RefreshTokenExpiredError,
 )
 from app.api.deps import get_db
+from app.api.routing import DeadlineRoute
+from app.core.timing import stage
+from app.services.activity_service import activity_log
 
-router = APIRouter()
+router = APIRouter(route_class=DeadlineRoute)
 security_scheme = HTTPBearer()
+optional_security_scheme = HTTPBearer(auto_error=False)
 
 
 async def get_user_service(db=Depends(get_db)):
@@ -34,10 +41,15 @@ async def get_auth_service(db=Depends(get_db)):
 @router.post("/login", response_model=Token)
 async def login(
     user_credentials: UserLogin,
+    idempotency_key: Optional[str] = Header(None),
     user_service: UserService = Depends(get_user_service),
     auth_service: AuthService = Depends(get_auth_service),
 ):
-    """Login with email and password, return access and refresh tokens."""
+    """Login with email and password, return access and refresh tokens.
+
+    Retries sending the same ``Idempotency-Key`` get the same refresh token
+    rather than opening another session.
+    """
     user = await user_service.authenticate_user(
         user_credentials.email, user_credentials.password
     )
@@ -50,7 +62,11 @@ async def login(
 
     try:
         access_token = auth_service.create_access_token(data={"sub": str(user.id)})
-        refresh_token = await auth_service.create_refresh_token(str(user.id))
+        refresh_token = await auth_service.create_refresh_token(
+            str(user.id), request_key=idempotency_key
+        )
+        await auth_service.enforce_session_cap(str(user.id))
+        await activity_log.record("login", actor_id=str(user.id))
         return Token(access_token=access_token, refresh_token=refresh_token)
     except TokenGenerationError as e:
         raise HTTPException(
@@ -105,10 +121,12 @@ async def get_current_user(
     """Dependency to get current authenticated user."""
     try:
         token = credentials.credentials
-        token_data = AuthService.verify_token(token, "access")
-        
+        with stage("auth"):
+            token_data = AuthService.verify_token(token, "access")
+
         # Get user from database
-        user = await user_service.get_user(token_data.id)
+        with stage("user_lookup"):
+            user = await user_service.get_user(token_data.id)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -130,6 +148,10 @@ async def get_current_user(
             detail=f"Access token is invalid: {str(e)}",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    except PyMongoError:
+        # Database failures (including deadline timeouts, which DeadlineRoute
+        # turns into 504) say nothing about the token.
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -138,6 +160,30 @@ async def get_current_user(
         )
 
 
+async def get_stream_user(
+    token: Optional[str] = Query(
+        None, description="Access token, for clients such as EventSource"
+    ),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(
+        optional_security_scheme
+    ),
+    user_service: UserService = Depends(get_user_service),
+):
+    """Like get_current_user, but also accepts the access token as ``?token=``.
+
+    Browser ``EventSource`` can't send an Authorization header.
+    """
+    if credentials is None:
+        if not token:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Not authenticated",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    return await get_current_user(credentials, user_service)
+
+
 @router.get("/me", response_model=UserRead)
 async def get_me(current_user: UserRead = Depends(get_current_user)):
     """Get current user details."""
@@ -170,6 +216,7 @@ async def logout(
                 detail="Failed to revoke refresh token"
             )
 
+        await activity_log.record("logout", actor_id=current_user.id)
         return {"message": "Successfully logged out", "revoked_tokens": 1}
 
     except TokenGenerationError as e:
@@ -187,6 +234,9 @@ async def logout_all(
     """Logout from all devices by revoking all refresh tokens for the current user."""
     try:
         revoked_count = await auth_service.revoke_all_user_refresh_tokens(current_user.id)
+        await activity_log.record(
+            "logout_all", actor_id=current_user.id, revoked_tokens=revoked_count
+        )
         return {
             "message": "Successfully logged out from all devices",
             "revoked_tokens": revoked_count
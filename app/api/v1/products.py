@@ -1,12 +1,31 @@
 from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Depends
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Depends, Query
 
-from app.schemas.product import ProductBase, ProductRead
+from app.schemas.product import (
+    ProductBase,
+    ProductPage,
+    ProductRead,
+    ProductFacets,
+    LeaderboardEntry,
+    RatingTrendPoint,
+    SimilarProduct,
+)
 from app.services.product_service import ProductService
 from app.api.deps import get_db
+from app.api.routing import DeadlineRoute, fieldset_response
+from app.core.deadline import deadline
+from app.core.fields import parse_fields
 from app.api.v1.auth import get_current_user
+from app.services.activity_service import activity_log
 
-router = APIRouter(prefix="/products", dependencies=[Depends(get_current_user)])
+FIELDS_DESCRIPTION = "Comma separated product fields to return, e.g. name,price"
+
+router = APIRouter(
+    prefix="/products",
+    dependencies=[Depends(get_current_user)],
+    route_class=DeadlineRoute,
+)
 
 
 async def get_product_service(db=Depends(get_db)):
@@ -14,32 +33,116 @@ async def get_product_service(db=Depends(get_db)):
     return ProductService(db)
 
 
-@router.get("", response_model=List[ProductRead])
+@router.get("", response_model=ProductPage)
 async def list_products(
     name: Optional[str] = None,
+    category: Optional[List[str]] = Query(None),
+    price_min: Optional[int] = None,
+    price_max: Optional[int] = None,
+    in_stock: Optional[bool] = None,
+    min_rating: Optional[float] = None,
+    sort: Optional[str] = Query(
+        None,
+        description="price, average_rating or createdAt; prefix - for descending",
+    ),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    service: ProductService = Depends(get_product_service),
+):
+    """List products with optional filters, one page at a time."""
+    try:
+        fieldset = parse_fields(fields, ProductRead)
+        page = await service.list_products(
+            name=name,
+            category=category,
+            price_min=price_min,
+            price_max=price_max,
+            in_stock=in_stock,
+            min_rating=min_rating,
+            sort=sort,
+            limit=limit,
+            cursor=cursor,
+            fields=fieldset,
+        )
+        return fieldset_response(page, fieldset)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/facets", response_model=ProductFacets)
+@deadline(30000)  # may rebuild the summary on first use
+async def get_product_facets(
+    service: ProductService = Depends(get_product_service),
+):
+    """Get product counts per category, price bucket and rating band."""
+    return await service.get_facets()
+
+
+@router.get("/top-rated", response_model=List[LeaderboardEntry])
+async def get_top_rated_products(
     category: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=100),
     service: ProductService = Depends(get_product_service),
 ):
-    return await service.list_products(name, category)
+    """Get the top rated products in a category, or across all categories."""
+    return await service.get_top_rated(category, limit)
 
 
 @router.post("", response_model=ProductRead, status_code=201)
 async def add_product(
     payload: ProductBase,
     service: ProductService = Depends(get_product_service),
+    current_user=Depends(get_current_user),
 ):
-    return await service.add_product(payload)
+    product = await service.add_product(payload)
+    await activity_log.record(
+        "product_create", current_user.id, "product", product.id
+    )
+    return product
 
 
 @router.get("/{product_id}", response_model=ProductRead)
 async def get_product(
     product_id: str,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     service: ProductService = Depends(get_product_service),
 ):
-    product = await service.get_product(product_id)
+    try:
+        fieldset = parse_fields(fields, ProductRead)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    product = await service.get_product(product_id, fieldset)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    return product
+    return fieldset_response(product, fieldset)
+
+
+@router.get("/{product_id}/rating-trend", response_model=List[RatingTrendPoint])
+async def get_product_rating_trend(
+    product_id: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    service: ProductService = Depends(get_product_service),
+):
+    """Daily review count and average rating (default: the last year)."""
+    try:
+        return await service.get_rating_trend(product_id, start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/{product_id}/similar", response_model=List[SimilarProduct])
+async def get_similar_products(
+    product_id: str,
+    limit: int = Query(10, ge=1, le=50),
+    service: ProductService = Depends(get_product_service),
+):
+    """Products most often reviewed by the same reviewers (computed offline)."""
+    try:
+        return await service.get_similar_products(product_id, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.put("/{product_id}", response_model=ProductRead)
@@ -47,10 +150,12 @@ async def update_product(
     product_id: str,
     payload: ProductBase,
     service: ProductService = Depends(get_product_service),
+    current_user=Depends(get_current_user),
 ):
     product = await service.update_product(product_id, payload)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
+    await activity_log.record("product_update", current_user.id, "product", product_id)
     return product
 
 
@@ -58,9 +163,11 @@ async def update_product(
 async def delete_product(
     product_id: str,
     service: ProductService = Depends(get_product_service),
+    current_user=Depends(get_current_user),
 ):
     deleted = await service.delete_product(product_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Product not found")
+    await activity_log.record("product_delete", current_user.id, "product", product_id)
 
     return {"message": "Review deleted successfully"}
@@ -1,12 +1,37 @@
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Depends
-
-from app.schemas.review import ReviewBase, ReviewRead, ReviewUpdate, ReviewProductResp
+from typing import Optional
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
+
+from app.schemas.review import (
+    ReviewBase,
+    ReviewRead,
+    ReviewUpdate,
+    ReviewProductResp,
+    ReviewPage,
+)
 from app.services.review_service import ReviewService
 from app.api.deps import get_db
-from app.api.v1.auth import get_current_user
-
-router = APIRouter(prefix="/reviews", dependencies=[Depends(get_current_user)])
+from app.api.routing import DeadlineRoute, fieldset_response
+from app.api.v1.auth import get_current_user, get_stream_user
+from app.core.fields import parse_fields
+from app.services.activity_service import activity_log
+from app.services.review_events import review_events
+
+FIELDS_DESCRIPTION = "Comma separated review fields to return, e.g. rating,comment"
+
+router = APIRouter(
+    prefix="/reviews",
+    dependencies=[Depends(get_current_user)],
+    route_class=DeadlineRoute,
+)
+# The live feed authenticates separately so EventSource clients can pass
+# the access token as a query parameter.
+stream_router = APIRouter(
+    prefix="/reviews",
+    dependencies=[Depends(get_stream_user)],
+    route_class=DeadlineRoute,
+)
 
 
 async def get_review_service(db=Depends(get_db)):
@@ -14,26 +39,67 @@ async def get_review_service(db=Depends(get_db)):
     return ReviewService(db)
 
 
-@router.get("", response_model=List[ReviewRead])
+@router.get("", response_model=ReviewPage)
 async def list_reviews(
+    product_id: Optional[str] = None,
+    reviewer_id: Optional[str] = None,
+    min_rating: Optional[int] = None,
+    max_rating: Optional[int] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     service: ReviewService = Depends(get_review_service),
     current_user=Depends(get_current_user),
 ):
-    return await service.list_reviews(reviewer_id=current_user.id)
+    """List reviews with optional filters, newest first, one page at a time."""
+    try:
+        fieldset = parse_fields(fields, ReviewRead)
+        page = await service.list_reviews(
+            reviewer_id=current_user.id,
+            product_id=product_id,
+            filter_reviewer_id=reviewer_id,
+            min_rating=min_rating,
+            max_rating=max_rating,
+            created_after=created_after,
+            created_before=created_before,
+            limit=limit,
+            cursor=cursor,
+            fields=fieldset,
+        )
+        return fieldset_response(page, fieldset)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/{product_id}", response_model=ReviewProductResp)
 async def get_product_review(
     product_id: str,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     service: ReviewService = Depends(get_review_service),
     current_user=Depends(get_current_user),
 ):
+    try:
+        fieldset = parse_fields(fields, ReviewRead)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     product_reviews = await service.get_product_review(
-        product_id, reviewer_id=current_user.id
+        product_id, reviewer_id=current_user.id, fields=fieldset
     )
     if not product_reviews:
         raise HTTPException(status_code=404, detail="Review for this product not found")
-    return product_reviews
+    return fieldset_response(product_reviews, fieldset)
+
+
+@stream_router.get("/{product_id}/stream")
+async def stream_product_reviews(product_id: str):
+    """Server-Sent Events feed of review create/update/delete for a product."""
+    return StreamingResponse(
+        review_events.stream(product_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.post("/{product_id}", response_model=ReviewRead, status_code=201)
@@ -45,12 +111,16 @@ async def create_review(
 ):
     """Create a new review for a product. Reviewer ID and name are taken from authenticated user."""
     try:
-        return await service.create_review(
+        review = await service.create_review(
             product_id=product_id,
             review_data=review_data,
             reviewer_id=current_user.id,
             reviewer_name=current_user.name,
         )
+        await activity_log.record(
+            "review_create", current_user.id, "review", review.id, product_id=product_id
+        )
+        return review
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -81,6 +151,7 @@ async def update_review(
                 detail="Review not found or you don't have permission to update it",
             )
 
+        await activity_log.record("review_update", current_user.id, "review", review_id)
         return updated_review
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -105,15 +176,26 @@ async def delete_review(
                 detail="Review not found or you don't have permission to delete it",
             )
 
+        await activity_log.record("review_delete", current_user.id, "review", review_id)
         return {"message": "Review deleted successfully"}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
-# @router.get("/user/me", response_model=List[ReviewRead])
-# async def get_my_reviews(
-#     service: ReviewService = Depends(get_review_service),
-#     current_user=Depends(get_current_user),
-# ):
-#     """Get all reviews created by the current authenticated user."""
-#     return await service.get_user_reviews(current_user.id)
+@router.get("/user/me", response_model=ReviewPage)
+async def get_my_reviews(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    service: ReviewService = Depends(get_review_service),
+    current_user=Depends(get_current_user),
+):
+    """Get reviews created by the current authenticated user, newest first."""
+    try:
+        fieldset = parse_fields(fields, ReviewRead)
+        page = await service.get_user_reviews(
+            current_user.id, limit=limit, cursor=cursor, fields=fieldset
+        )
+        return fieldset_response(page, fieldset)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,12 +1,20 @@
-from typing import List
-from fastapi import APIRouter, HTTPException, Depends
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Query
 
 from app.schemas.user import UserRead, UserCreate, UserUpdate
 from app.services.user_service import UserService
 from app.api.deps import get_db
+from app.api.routing import DeadlineRoute, fieldset_response
+from app.core.fields import parse_fields
 from app.api.v1.auth import get_current_user
 
-router = APIRouter(prefix="/users", dependencies=[Depends(get_current_user)])
+FIELDS_DESCRIPTION = "Comma separated user fields to return, e.g. name,email"
+
+router = APIRouter(
+    prefix="/users",
+    dependencies=[Depends(get_current_user)],
+    route_class=DeadlineRoute,
+)
 
 
 async def get_user_service(db=Depends(get_db)):
@@ -16,9 +24,14 @@ async def get_user_service(db=Depends(get_db)):
 
 @router.get("", response_model=List[UserRead])
 async def list_users(
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     service: UserService = Depends(get_user_service),
 ):
-    return await service.list_users()
+    try:
+        fieldset = parse_fields(fields, UserRead)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return fieldset_response(await service.list_users(fieldset), fieldset)
 
 
 @router.post("", response_model=UserRead, status_code=201)
@@ -32,12 +45,17 @@ async def create_user(
 @router.get("/{user_id}", response_model=UserRead)
 async def get_user(
     user_id: str,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     service: UserService = Depends(get_user_service),
 ):
-    user = await service.get_user(user_id)
+    try:
+        fieldset = parse_fields(fields, UserRead)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    user = await service.get_user(user_id, fieldset)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    return fieldset_response(user, fieldset)
 
 
 @router.put("/{user_id}", response_model=UserRead)
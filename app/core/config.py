@@ -1,3 +1,6 @@
+from functools import lru_cache
+from typing import List
+
 from pydantic_settings import BaseSettings
 
 
@@ -8,12 +11,110 @@ class Settings(BaseSettings):
     # MongoDB settings
     mongodb_uri: str
     database_name: str
+    db_max_pool_size: int = 50
+    db_min_pool_size: int = 10
+
+    # Startup warmup: retry delay while MongoDB is unreachable
+    warmup_retry_seconds: float = 2.0
 
     # JWT settings
     secret_key: str
     algorithm: str
     access_token_expire_minutes: int
     refresh_token_expire_days: int
+    max_sessions_per_user: int = 10
+
+    # Refresh token compaction
+    refresh_token_retention_hours: int = 24
+    token_compaction_interval_seconds: int = 3600
+    token_compaction_batch_size: int = 1000
+    token_compaction_batch_delay_seconds: float = 0.1
+
+    # Catalog facet settings (lower bounds of each price bucket)
+    facet_price_boundaries: List[int] = [0, 100000, 500000, 1000000, 5000000]
+    # Reject product filter shapes without a supporting index (else log a warning)
+    product_filter_strict: bool = False
+    product_max_page_size: int = 100
+
+    # Top-rated leaderboard settings
+    leaderboard_min_reviews: int = 3
+    leaderboard_bayesian: bool = True
+    leaderboard_prior_rating: float = 3.0
+    leaderboard_prior_weight: int = 5
+
+    # Review listing settings
+    review_max_page_size: int = 100
+    # Match legacy string product_id/reviewer_id refs until the migration ran
+    review_refs_dual_read: bool = True
+    # Number of newest reviews embedded on each product document
+    product_recent_reviews: int = 5
+
+    # Background job settings
+    job_poll_interval_seconds: float = 1.0
+    job_lease_seconds: int = 60
+    job_max_attempts: int = 5
+    job_retry_delay_seconds: int = 30
+    job_batch_size: int = 500
+    job_batch_delay_seconds: float = 0.05
+    # Finished jobs are removed by a TTL index after this long
+    job_retention_seconds: int = 7 * 86400
+
+    # Default per-request MongoDB deadline (maxTimeMS)
+    request_timeout_ms: int = 5000
+
+    # Emit a Server-Timing header with per-stage durations
+    server_timing_enabled: bool = False
+    # Level of the per-request JSON timing log (app.requests); "OFF" disables it
+    request_log_level: str = "INFO"
+
+    # Idempotency-Key replay cache
+    idempotency_ttl_seconds: int = 86400
+    idempotency_wait_seconds: float = 10.0
+    # In-progress claims expire after this long and can be retried; keep it
+    # above the longest endpoint deadline.
+    idempotency_lease_seconds: int = 60
+
+    # Response compression, encodings in server preference order
+    compression_enabled: bool = True
+    compression_encodings: List[str] = ["br", "zstd", "gzip"]
+    compression_minimum_size: int = 1024
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+    compression_zstd_level: int = 3
+
+    # Activity/audit log buffering ("drop" or "block" when the buffer is full)
+    activity_buffer_size: int = 10000
+    activity_batch_size: int = 500
+    activity_flush_interval_seconds: float = 1.0
+    activity_overflow_policy: str = "drop"
+
+    # Traffic capture for replay testing (opt-in)
+    capture_enabled: bool = False
+    capture_path: str = "captures/traffic.jsonl"
+    capture_sample_rate: float = 0.01
+    capture_max_bytes: int = 50 * 1024 * 1024
+    capture_backup_count: int = 5
+
+    # Live review feed ("hooks" = in-process, "change_stream" = shared watch)
+    review_events_source: str = "hooks"
+    review_events_queue_size: int = 100
+    review_events_heartbeat_seconds: float = 15.0
+
+    # Admission control settings (concurrent requests / queued requests)
+    admission_queue_timeout_seconds: float = 2.0
+    admission_login_limit: int = 8
+    admission_login_queue: int = 16
+    admission_list_limit: int = 16
+    admission_list_queue: int = 32
+    admission_default_limit: int = 40
+    admission_default_queue: int = 100
+    admission_stream_limit: int = 5000
 
     class Config:
         env_file = ".env"
+
+
+@lru_cache
+def get_settings() -> Settings:
+    """Return the process-wide settings, parsing ``.env`` only once."""
+    return Settings()
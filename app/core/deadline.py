@@ -0,0 +1,44 @@
+"""Per-request database deadlines and cursor tracking."""
+
+from contextvars import ContextVar
+from typing import Callable, List, Optional
+
+# Cursors opened while handling the current request, closed on disconnect.
+_request_cursors: ContextVar[Optional[List]] = ContextVar(
+    "request_cursors", default=None
+)
+
+
+def deadline(timeout_ms: int) -> Callable:
+    """Override the default request deadline for a route endpoint."""
+
+    def decorator(endpoint: Callable) -> Callable:
+        endpoint.deadline_ms = timeout_ms
+        return endpoint
+
+    return decorator
+
+
+def start_cursor_tracking() -> List:
+    """Begin collecting cursors for the current request."""
+    cursors: List = []
+    _request_cursors.set(cursors)
+    return cursors
+
+
+def track_cursor(cursor):
+    """Register a Motor cursor so it can be killed if the client goes away."""
+    cursors = _request_cursors.get()
+    if cursors is not None:
+        cursors.append(cursor)
+    return cursor
+
+
+async def close_cursors(cursors: List):
+    """Close (and kill server-side) every tracked cursor."""
+    for cursor in cursors:
+        try:
+            await cursor.close()
+        except Exception:
+            pass
+    cursors.clear()
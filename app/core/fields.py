@@ -0,0 +1,63 @@
+"""Sparse fieldsets: ``?fields=`` parsing, Mongo projections and partial models."""
+
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, Optional, Type
+
+from pydantic import BaseModel, create_model
+
+Fields = Optional[FrozenSet[str]]
+
+
+def parse_fields(fields: Optional[str], model: Type[BaseModel]) -> Fields:
+    """Parse a comma separated ``fields`` parameter against a response model.
+
+    Returns None when no fieldset was requested. ``id`` is always included.
+    Raises ValueError for names that are not fields of ``model``.
+    """
+    if not fields:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(model.model_fields)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return frozenset(requested | {"id"})
+
+
+def projection(
+    fields: Fields,
+    sources: Optional[Dict[str, Iterable[str]]] = None,
+    required: Iterable[str] = (),
+) -> Optional[dict]:
+    """Mongo projection fetching only the document keys behind ``fields``.
+
+    ``sources`` maps response fields that are derived from other document
+    keys (e.g. ``isEditable`` from ``reviewer_id``); ``required`` lists keys
+    the service itself needs, such as pagination sort keys.
+    """
+    if fields is None:
+        return None
+    sources = sources or {}
+    keys = set(required)
+    for name in fields:
+        keys.update(sources.get(name, (name,)))
+    keys.discard("id")  # served from _id, which Mongo always returns
+    return {key: 1 for key in sorted(keys)}
+
+
+@lru_cache(maxsize=256)
+def partial_model(model: Type[BaseModel], fields: FrozenSet[str]) -> Type[BaseModel]:
+    """A copy of ``model`` restricted to ``fields``, with every field optional."""
+    definitions = {
+        name: (Optional[info.annotation], None)
+        for name, info in model.model_fields.items()
+        if name in fields
+    }
+    return create_model(f"Partial{model.__name__}", **definitions)
+
+
+def build(model: Type[BaseModel], doc: dict, fields: Fields) -> BaseModel:
+    """Build ``model`` from ``doc``, or its partial model for a fieldset."""
+    if fields is None:
+        return model(**doc)
+    data = {key: value for key, value in doc.items() if key in fields}
+    return partial_model(model, fields)(**data)
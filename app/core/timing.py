@@ -0,0 +1,66 @@
+"""Lightweight per-request stage timers."""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+_current_timings: ContextVar[Optional["RequestTimings"]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+class RequestTimings:
+    """Accumulated duration (ms) and call count per named stage."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+
+    def add(self, stage: str, duration_ms: float):
+        self.durations[stage] = self.durations.get(stage, 0.0) + duration_ms
+        self.counts[stage] = self.counts.get(stage, 0) + 1
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing_header(self) -> str:
+        """Format as a ``Server-Timing`` header value."""
+        parts = []
+        for stage, duration in self.durations.items():
+            part = f"{stage};dur={duration:.1f}"
+            if self.counts[stage] > 1:
+                part += f';desc="{self.counts[stage]} calls"'
+            parts.append(part)
+        parts.append(f"total;dur={self.elapsed_ms():.1f}")
+        return ", ".join(parts)
+
+    def as_log_fields(self) -> dict:
+        fields = {f"{k}_ms": round(v, 2) for k, v in self.durations.items()}
+        fields["total_ms"] = round(self.elapsed_ms(), 2)
+        return fields
+
+
+def start_request_timings() -> RequestTimings:
+    """Begin timing a new request in the current context."""
+    timings = RequestTimings()
+    _current_timings.set(timings)
+    return timings
+
+
+def record(stage: str, duration_ms: float):
+    """Add a duration to the current request, if one is being timed."""
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add(stage, duration_ms)
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block of code as a named stage of the current request."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, (time.perf_counter() - started) * 1000)
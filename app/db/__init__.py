@@ -1,12 +1,72 @@
 """Database connection using Motor (async MongoDB driver)."""
 
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
-from app.core.config import Settings
+from pymongo import monitoring
+from app.core.config import get_settings
+from app.middleware.timing import CommandTimingListener
+
+settings = get_settings()
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Track connection pool size and usage for readiness reporting."""
+
+    def __init__(self):
+        self.open = 0
+        self.checked_out = 0
+        self.created_total = 0
+        self.checkout_failures = 0
+
+    def stats(self) -> dict:
+        return {
+            "open": self.open,
+            "checked_out": self.checked_out,
+            "idle": self.open - self.checked_out,
+            "created_total": self.created_total,
+            "checkout_failures": self.checkout_failures,
+            "min_pool_size": settings.db_min_pool_size,
+            "max_pool_size": settings.db_max_pool_size,
+        }
+
+    def connection_created(self, event):
+        self.open += 1
+        self.created_total += 1
+
+    def connection_closed(self, event):
+        self.open -= 1
+
+    def connection_checked_out(self, event):
+        self.checked_out += 1
+
+    def connection_checked_in(self, event):
+        self.checked_out -= 1
+
+    def connection_check_out_failed(self, event):
+        self.checkout_failures += 1
+
+    # Remaining pool events are not needed for the stats above.
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
 
-settings = Settings()
 
 client: AsyncIOMotorClient = None
 db: AsyncIOMotorDatabase = None
+pool_stats = PoolStatsListener()
 
 
 async def connect_to_db():
@@ -14,8 +74,10 @@ async def connect_to_db():
     global client, db
     client = AsyncIOMotorClient(
         settings.mongodb_uri,
-        maxpoolsize=50,
+        maxpoolsize=settings.db_max_pool_size,
+        minpoolsize=settings.db_min_pool_size,
         serverSelectionTimeoutMS=5000,
+        event_listeners=[CommandTimingListener(), pool_stats],
     )
     db = client[settings.database_name]
     try:
@@ -25,6 +87,12 @@ async def connect_to_db():
         print(f"Failed to connect to MongoDB: {e}")
 
 
+async def supports_snapshot_reads(db: AsyncIOMotorDatabase) -> bool:
+    """Whether the server takes snapshot reads (replica sets, sharded clusters)."""
+    hello = await db.command("hello")
+    return "setName" in hello or hello.get("msg") == "isdbgrid"
+
+
 async def close_db_connection():
     """Close MongoDB connection on app shutdown."""
     global client
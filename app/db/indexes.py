@@ -0,0 +1,24 @@
+"""Index creation for the collections used by the services."""
+
+from app.services.activity_service import activity_log
+from app.services.auth_service import AuthService
+from app.services.facet_service import FacetService
+from app.services.idempotency_service import IdempotencyService
+from app.services.job_service import JobService
+from app.services.leaderboard_service import LeaderboardService
+from app.services.product_service import ProductService
+from app.services.rating_trend_service import RatingTrendService
+from app.services.review_service import ReviewService
+
+
+async def ensure_indexes(db):
+    """Create all service indexes. Safe to call on every startup."""
+    await activity_log.ensure_indexes(db)
+    await AuthService(db).ensure_indexes()
+    await FacetService(db).ensure_indexes()
+    await IdempotencyService(db).ensure_indexes()
+    await JobService(db).ensure_indexes()
+    await LeaderboardService(db).ensure_indexes()
+    await ProductService(db).ensure_indexes()
+    await RatingTrendService(db).ensure_indexes()
+    await ReviewService(db).ensure_indexes()
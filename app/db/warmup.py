@@ -0,0 +1,89 @@
+"""Startup warmup and readiness state."""
+
+import asyncio
+import logging
+
+from app.core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class Readiness:
+    """Whether the app has finished warming up and may receive traffic."""
+
+    def __init__(self):
+        self.ready = False
+        self.stage = "starting"
+        self.error = None
+
+
+readiness = Readiness()
+
+
+async def warm_up(db):
+    """Connect, create indexes, build facets, pre-open pool and prime hot paths.
+
+    Retries until MongoDB is reachable; ``readiness.ready`` flips only when
+    every step has completed.
+    """
+    from app.db.indexes import ensure_indexes
+    from app.services.facet_service import FacetService
+
+    while True:
+        try:
+            readiness.stage = "ping"
+            await db.client.admin.command("ping")
+
+            readiness.stage = "indexes"
+            await ensure_indexes(db)
+
+            readiness.stage = "facets"
+            await FacetService(db).ensure_built()
+
+            readiness.stage = "pool"
+            await warm_pool(db, settings.db_min_pool_size)
+
+            readiness.stage = "prime"
+            prime_hot_paths()
+            break
+        except Exception as e:
+            readiness.error = str(e)
+            logger.warning("Warmup failed at %s: %s", readiness.stage, e)
+            await asyncio.sleep(settings.warmup_retry_seconds)
+
+    readiness.stage = "ready"
+    readiness.error = None
+    readiness.ready = True
+    print("Warmup complete, ready to serve traffic")
+
+
+async def warm_pool(db, connections: int):
+    """Open ``connections`` pooled connections by running concurrent pings.
+
+    Each in-flight ping holds its own connection, so the pool (and any TLS
+    handshakes) are paid for here rather than by the first burst of requests.
+    """
+    if connections <= 0:
+        return
+    await asyncio.gather(
+        *(db.command("ping") for _ in range(connections))
+    )
+
+
+def prime_hot_paths():
+    """Run the first JWT encode/decode and model builds ahead of traffic."""
+    from datetime import datetime, timezone
+
+    from app.schemas.product import ProductRead
+    from app.schemas.review import ReviewRead
+    from app.schemas.user import UserRead
+    from app.services.auth_service import AuthService
+
+    token = AuthService.create_access_token(data={"sub": "warmup"})
+    AuthService.verify_token(token, "access")
+
+    now = datetime.now(timezone.utc)
+    UserRead(id="warmup", email="warmup@example.com", createdAt=now)
+    ProductRead(id="warmup", name="warmup", createdAt=now)
+    ReviewRead(id="warmup", rating=5, createdAt=now)
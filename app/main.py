@@ -1,15 +1,32 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 
-from app.core.config import Settings
+from app.core.config import get_settings
 from app.api.v1 import users as users_router
 from app.api.v1 import auth as auth_router
 from app.api.v1 import products as product_router
 from app.api.v1 import reviews as review_router
+from app.api import health as health_router
 from app.db import connect_to_db, close_db_connection
+from app.db.warmup import warm_up
+from app.api.deps import get_db
+from app.services.job_service import JobWorker
+from app.services.auth_service import RefreshTokenCompactor
+from app.services.activity_service import activity_log
+from app.services.review_events import review_events
+from app.api.routing import TimedJSONResponse
+from app.middleware.timing import ServerTimingMiddleware, configure_request_logging
+from app.middleware.idempotency import IdempotencyMiddleware
+from app.middleware.capture import TrafficCaptureMiddleware
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.admission import (
+    AdmissionControlMiddleware,
+    create_admission_controller,
+)
 
-settings = Settings()
+settings = get_settings()
 
 
 # Define the lifespan context manager
@@ -17,17 +34,40 @@ settings = Settings()
 async def lifespan(app: FastAPI):
     # Startup logic
     print("Application startup: Initializing resources...")
+    if settings.request_log_level.upper() != "OFF":
+        configure_request_logging(settings.request_log_level)
     await connect_to_db()
+    db = await get_db()
+    # Warm up in the background so /health/live answers while
+    # /health/ready stays 503 until the pool and hot paths are primed.
+    warmup_task = asyncio.create_task(warm_up(db))
+    job_worker = JobWorker(db)
+    job_worker.start()
+    token_compactor = RefreshTokenCompactor(db)
+    token_compactor.start()
+    activity_log.start(db)
+    if settings.review_events_source == "change_stream":
+        review_events.start_change_stream(db)
 
     yield
     # Shutdown logic
     print("Application shutdown: Cleaning up resources...")
+    warmup_task.cancel()
+    await job_worker.stop()
+    await token_compactor.stop()
+    await activity_log.stop()
+    await review_events.stop()
     await close_db_connection()
 
 
-app = FastAPI(title=settings.app_name, lifespan=lifespan)
+app = FastAPI(
+    title=settings.app_name,
+    lifespan=lifespan,
+    default_response_class=TimedJSONResponse,
+)
 
 
+app.include_router(health_router.router)
 app.include_router(auth_router.router, prefix=settings.api_v1_prefix, tags=["auth"])
 app.include_router(users_router.router, prefix=settings.api_v1_prefix, tags=["users"])
 app.include_router(
@@ -36,6 +76,42 @@ app.include_router(
 app.include_router(
     review_router.router, prefix=settings.api_v1_prefix, tags=["reviews"]
 )
+app.include_router(
+    review_router.stream_router, prefix=settings.api_v1_prefix, tags=["reviews"]
+)
+
+if settings.capture_enabled:
+    app.add_middleware(
+        TrafficCaptureMiddleware,
+        path=settings.capture_path,
+        sample_rate=settings.capture_sample_rate,
+        max_bytes=settings.capture_max_bytes,
+        backup_count=settings.capture_backup_count,
+    )
+
+if settings.compression_enabled:
+    # Inside IdempotencyMiddleware so its replay cache stores compressed bytes.
+    app.add_middleware(
+        CompressionMiddleware,
+        encodings=settings.compression_encodings,
+        minimum_size=settings.compression_minimum_size,
+        gzip_level=settings.compression_gzip_level,
+        brotli_quality=settings.compression_brotli_quality,
+        zstd_level=settings.compression_zstd_level,
+    )
+
+app.add_middleware(
+    IdempotencyMiddleware,
+    # Login is left out: its response carries tokens that must never be stored.
+    paths=[
+        f"{settings.api_v1_prefix}/products/?",
+        f"{settings.api_v1_prefix}/reviews/[^/]+",
+    ],
+    wait_timeout=settings.idempotency_wait_seconds,
+)
+
+admission_controller = create_admission_controller(settings)
+app.add_middleware(AdmissionControlMiddleware, controller=admission_controller)
 
 app.add_middleware(
     CORSMiddleware,
@@ -43,9 +119,32 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "Idempotent-Replayed"],
+)
+
+app.add_middleware(
+    ServerTimingMiddleware, emit_header=settings.server_timing_enabled
 )
 
 
 @app.get("/")
 async def root():
     return {"message": "Hello from Product Review API"}
+
+
+@app.get("/metrics/admission")
+async def admission_metrics():
+    """Active requests, queue depth and rejections per admission budget."""
+    return admission_controller.stats()
+
+
+@app.get("/metrics/activity")
+async def activity_metrics():
+    """Buffered and dropped audit log entries."""
+    return activity_log.stats()
+
+
+@app.get("/metrics/review-stream")
+async def review_stream_metrics():
+    """Live review feed subscribers and dropped slow consumers."""
+    return review_events.stats()
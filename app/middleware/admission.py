@@ -0,0 +1,168 @@
+"""Admission control: per-route concurrency budgets with bounded wait queues."""
+
+import asyncio
+import math
+import re
+from typing import Callable, Dict, Optional
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.timing import stage
+
+
+class Bulkhead:
+    """Concurrency limit with a bounded, deadline-limited wait queue."""
+
+    def __init__(self, name: str, limit: int, max_queue: int, timeout: float):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def acquire(self) -> bool:
+        """Acquire a slot, waiting up to ``timeout``. Returns False if shed."""
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            self.rejected += 1
+            return False
+
+        self.waiting += 1
+        try:
+            with stage("queue"):
+                await asyncio.wait_for(
+                    self._semaphore.acquire(), timeout=self.timeout
+                )
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            return False
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        return True
+
+    def release(self):
+        self.active -= 1
+        self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queue_depth": self.waiting,
+            "rejected": self.rejected,
+        }
+
+
+class AdmissionController:
+    """Maps requests to bulkheads so expensive routes can't starve cheap ones."""
+
+    def __init__(
+        self,
+        bulkheads: Dict[str, Bulkhead],
+        classify: Callable[[str, str], str],
+        exempt_paths: tuple = (),
+    ):
+        self.bulkheads = bulkheads
+        self.classify = classify
+        self.exempt_paths = exempt_paths
+
+    def bulkhead_for(self, method: str, path: str) -> Optional[Bulkhead]:
+        if path in self.exempt_paths:
+            return None
+        return self.bulkheads.get(self.classify(method, path))
+
+    def stats(self) -> dict:
+        return {name: b.stats() for name, b in self.bulkheads.items()}
+
+
+class AdmissionControlMiddleware:
+    """Reject requests fast with 503 + ``Retry-After`` when a budget is full."""
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        bulkhead = self.controller.bulkhead_for(scope["method"], scope["path"])
+        if bulkhead is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await bulkhead.acquire():
+            response = JSONResponse(
+                {"detail": "Server is busy, please retry later"},
+                status_code=503,
+                headers={"Retry-After": str(max(1, math.ceil(bulkhead.timeout)))},
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            bulkhead.release()
+
+
+def create_admission_controller(settings) -> AdmissionController:
+    """Build the controller with separate budgets for login and list routes."""
+    prefix = re.escape(settings.api_v1_prefix)
+    login_path = re.compile(rf"{prefix}/login")
+    # Collection listings, a product's reviews and the caller's review history.
+    list_paths = re.compile(
+        rf"{prefix}/(products|reviews|users|reviews/user/me|reviews/[^/]+)"
+    )
+    timeout = settings.admission_queue_timeout_seconds
+
+    def classify(method: str, path: str) -> str:
+        path = path.rstrip("/")
+        if method == "POST" and login_path.fullmatch(path):
+            return "login"
+        if method == "GET" and path.endswith("/stream"):
+            return "stream"
+        if method == "GET" and list_paths.fullmatch(path):
+            return "list"
+        return "default"
+
+    bulkheads = {
+        "login": Bulkhead(
+            "login",
+            settings.admission_login_limit,
+            settings.admission_login_queue,
+            timeout,
+        ),
+        "list": Bulkhead(
+            "list",
+            settings.admission_list_limit,
+            settings.admission_list_queue,
+            timeout,
+        ),
+        # Long-lived SSE connections: capped, never queued, and kept out of
+        # the default budget so they can't pin its slots.
+        "stream": Bulkhead("stream", settings.admission_stream_limit, 0, timeout),
+        "default": Bulkhead(
+            "default",
+            settings.admission_default_limit,
+            settings.admission_default_queue,
+            timeout,
+        ),
+    }
+    return AdmissionController(
+        bulkheads,
+        classify,
+        exempt_paths=(
+            "/metrics/admission",
+            "/metrics/activity",
+            "/metrics/review-stream",
+            "/health/live",
+            "/health/ready",
+        ),
+    )
@@ -0,0 +1,118 @@
+"""Opt-in traffic capture for performance regression replays."""
+
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import time
+from urllib.parse import parse_qsl
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Query parameters whose values are never written to a capture.
+SENSITIVE_PARAMS = {"token", "refresh_token", "password", "email", "secret"}
+
+
+def body_shape(value):
+    """Replace every leaf of a JSON value with its type name."""
+    if isinstance(value, dict):
+        return {k: body_shape(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [body_shape(value[0])] if value else []
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    if isinstance(value, str):
+        return "str"
+    return "null"
+
+
+class TrafficCaptureMiddleware:
+    """Record sampled, anonymized request metadata to a rotating JSONL file.
+
+    Only the method, route template, concrete path, query parameters (minus
+    sensitive ones), the JSON body *shape*, status and duration are kept;
+    headers and body values are never stored. Lines are written from a
+    background thread so capture doesn't block the event loop.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        path: str,
+        sample_rate: float = 0.01,
+        max_bytes: int = 50 * 1024 * 1024,
+        backup_count: int = 5,
+    ):
+        self.app = app
+        self.sample_rate = sample_rate
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        records: queue.Queue = queue.Queue(-1)
+        self._listener = logging.handlers.QueueListener(records, handler)
+        self._listener.start()
+        self._logger = logging.getLogger("app.capture")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        self._logger.addHandler(logging.handlers.QueueHandler(records))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.time()
+        body_chunks = []
+        status_code = 500
+
+        async def capture_receive() -> Message:
+            message = await receive()
+            if message["type"] == "http.request":
+                body_chunks.append(message.get("body", b""))
+            return message
+
+        async def capture_send(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, capture_receive, capture_send)
+        finally:
+            self._write(scope, b"".join(body_chunks), status_code, started)
+
+    def _write(self, scope: Scope, body: bytes, status_code: int, started: float):
+        route = scope.get("route")
+        params = [
+            (k, "<redacted>" if k.lower() in SENSITIVE_PARAMS else v)
+            for k, v in parse_qsl(scope.get("query_string", b"").decode("latin-1"))
+        ]
+        try:
+            shape = body_shape(json.loads(body)) if body else None
+        except ValueError:
+            shape = "non-json"
+
+        self._logger.info(
+            json.dumps(
+                {
+                    "ts": started,
+                    "method": scope["method"],
+                    "route": getattr(route, "path", None),
+                    "path": scope["path"],
+                    "params": params,
+                    "body_shape": shape,
+                    "status": status_code,
+                    "duration_ms": round((time.time() - started) * 1000, 2),
+                }
+            )
+        )
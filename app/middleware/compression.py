@@ -0,0 +1,288 @@
+"""Negotiated brotli/zstd/gzip response compression."""
+
+import zlib
+from typing import Dict, List, Optional, Sequence
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Content types worth compressing; images and archives are already compact.
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "text/",
+)
+
+
+class GzipCodec:
+    """gzip via the standard library; always available."""
+
+    name = "gzip"
+
+    def __init__(self, level: int = 6):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+
+    def decompress(self, data: bytes) -> bytes:
+        return zlib.decompress(data, 47)
+
+    def stream(self) -> "_Stream":
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+
+        def compress(chunk: bytes) -> bytes:
+            return compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+        return _Stream(compress, compressor.flush)
+
+
+class BrotliCodec:
+    """Brotli; needs the optional ``brotli`` package."""
+
+    name = "br"
+
+    def __init__(self, quality: int = 4):
+        import brotli
+
+        self.brotli = brotli
+        self.quality = quality
+
+    def compress(self, data: bytes) -> bytes:
+        return self.brotli.compress(data, quality=self.quality)
+
+    def decompress(self, data: bytes) -> bytes:
+        return self.brotli.decompress(data)
+
+    def stream(self) -> "_Stream":
+        compressor = self.brotli.Compressor(quality=self.quality)
+
+        def compress(chunk: bytes) -> bytes:
+            return compressor.process(chunk) + compressor.flush()
+
+        return _Stream(compress, compressor.finish)
+
+
+class ZstdCodec:
+    """Zstandard; needs the optional ``zstandard`` package."""
+
+    name = "zstd"
+
+    def __init__(self, level: int = 3):
+        import zstandard
+
+        self.zstandard = zstandard
+        self.compressor = zstandard.ZstdCompressor(level=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        # Streamed frames carry no content size, so always decode incrementally.
+        return self.zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+    def stream(self) -> "_Stream":
+        compressor = self.compressor.compressobj()
+        flush_block = self.zstandard.COMPRESSOBJ_FLUSH_BLOCK
+
+        def compress(chunk: bytes) -> bytes:
+            return compressor.compress(chunk) + compressor.flush(flush_block)
+
+        return _Stream(compress, compressor.flush)
+
+
+class _Stream:
+    """Incremental compressor that flushes after every chunk."""
+
+    def __init__(self, compress, finish):
+        self.compress = compress
+        self.finish = finish
+
+
+SUPPORTED_ENCODINGS = ("br", "zstd", "gzip")
+
+
+def load_codecs(
+    encodings: Sequence[str],
+    gzip_level: int = 6,
+    brotli_quality: int = 4,
+    zstd_level: int = 3,
+) -> List:
+    """Codecs for ``encodings`` in server preference order.
+
+    brotli and zstd need their optional packages; encodings whose package
+    isn't installed are left out.
+    """
+    factories = {
+        # Keep in sync with SUPPORTED_ENCODINGS.
+        "br": lambda: BrotliCodec(brotli_quality),
+        "zstd": lambda: ZstdCodec(zstd_level),
+        "gzip": lambda: GzipCodec(gzip_level),
+    }
+    codecs = []
+    for encoding in encodings:
+        if encoding not in factories:
+            raise ValueError(f"Unsupported compression encoding: {encoding}")
+        try:
+            codecs.append(factories[encoding]())
+        except ImportError:
+            continue
+    return codecs
+
+
+def decompress(data: bytes, encoding: str) -> Optional[bytes]:
+    """Decode a body that was stored with ``Content-Encoding: encoding``.
+
+    Returns None when this instance can't decode it (unknown encoding, or
+    the optional brotli/zstandard package isn't installed here).
+    """
+    try:
+        codecs = load_codecs([encoding])
+    except ValueError:
+        return None
+    return codecs[0].decompress(data) if codecs else None
+
+
+def parse_accept_encoding(value: str) -> Dict[str, float]:
+    """``{coding: q}`` for an ``Accept-Encoding`` header value."""
+    accepted = {}
+    for item in value.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def accepts(accept_encoding: str, encoding: str) -> bool:
+    """Whether a client sending ``accept_encoding`` can read ``encoding``."""
+    accepted = parse_accept_encoding(accept_encoding)
+    return accepted.get(encoding, accepted.get("*", 0.0)) > 0
+
+
+def negotiate(accept_encoding: str, codecs: Sequence) -> Optional[object]:
+    """Pick the client's highest-q codec, ties going to server preference."""
+    accepted = parse_accept_encoding(accept_encoding)
+    best, best_q = None, 0.0
+    for codec in codecs:
+        q = accepted.get(codec.name, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = codec, q
+    return best
+
+
+class CompressionMiddleware:
+    """Compress responses with the best encoding the client accepts.
+
+    Single-message bodies smaller than ``minimum_size`` are sent as is.
+    Streamed bodies (e.g. Server-Sent Events) are compressed incrementally
+    and flushed after every chunk, so nothing is held back from the client.
+    Codecs are loaded on the first request, so brotli and zstandard aren't
+    imported at startup.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        encodings: Sequence[str],
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        zstd_level: int = 3,
+    ):
+        unsupported = set(encodings) - set(SUPPORTED_ENCODINGS)
+        if unsupported:
+            # Fail at startup rather than on the first request.
+            raise ValueError(
+                f"Unsupported compression encoding: {', '.join(sorted(unsupported))}"
+            )
+        self.app = app
+        self.encodings = list(encodings)
+        self.levels = {
+            "gzip_level": gzip_level,
+            "brotli_quality": brotli_quality,
+            "zstd_level": zstd_level,
+        }
+        self.minimum_size = minimum_size
+        self._codecs: Optional[List] = None
+
+    @property
+    def codecs(self) -> List:
+        if self._codecs is None:
+            self._codecs = load_codecs(self.encodings, **self.levels)
+        return self._codecs
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self.codecs:
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        codec = negotiate(accept_encoding, self.codecs)
+        if codec is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        stream = None
+        passthrough = False
+
+        async def compress_send(message: Message):
+            nonlocal start, stream, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None:
+                first, start = start, None
+                first["headers"] = list(first.get("headers", []))
+                headers = MutableHeaders(raw=first["headers"])
+                content_type = headers.get("content-type", "")
+                if not content_type.startswith(COMPRESSIBLE_TYPES):
+                    passthrough = True
+                else:
+                    headers.add_vary_header("Accept-Encoding")
+                    passthrough = (
+                        "content-encoding" in headers
+                        or first["status"] in (204, 304)
+                        or (not more_body and len(body) < self.minimum_size)
+                    )
+                if passthrough:
+                    await send(first)
+                    await send(message)
+                    return
+
+                headers["Content-Encoding"] = codec.name
+                if not more_body:
+                    body = codec.compress(body)
+                    headers["Content-Length"] = str(len(body))
+                    await send(first)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                del headers["Content-Length"]
+                stream = codec.stream()
+                await send(first)
+
+            body = stream.compress(body)
+            if not more_body:
+                body += stream.finish()
+            await send(
+                {"type": "http.response.body", "body": body, "more_body": more_body}
+            )
+
+        await self.app(scope, receive, compress_send)
@@ -0,0 +1,198 @@
+"""Idempotency-Key support with a stored response replay cache."""
+
+import asyncio
+import hashlib
+import re
+import time
+from typing import Iterable, List, Pattern
+
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.middleware.compression import accepts, decompress
+from app.services.idempotency_service import IdempotencyService
+
+# Response headers that must not be replayed verbatim.
+_SKIP_HEADERS = {b"content-length", b"server-timing", b"date", b"server"}
+# 4xx statuses that may succeed on retry (timeout, conflict, too early,
+# rate limited) or mean the client went away (499).
+_TRANSIENT_CLIENT_ERRORS = {408, 409, 425, 429, 499}
+
+
+def _is_final(status_code: int) -> bool:
+    """Whether a response settles the request: 2xx, or a non-transient 4xx."""
+    return 200 <= status_code < 300 or (
+        400 <= status_code < 500 and status_code not in _TRANSIENT_CLIENT_ERRORS
+    )
+
+
+class IdempotencyMiddleware:
+    """Replay stored responses for repeated ``Idempotency-Key`` POSTs.
+
+    The first request with a key runs normally and its response is stored.
+    Repeats get the stored response without reaching the route; concurrent
+    repeats wait for the first one to finish. Installed outside
+    ``CompressionMiddleware``, the stored body is the compressed one and is
+    replayed without recompressing it.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        paths: Iterable[str],
+        wait_timeout: float = 10.0,
+        poll_interval: float = 0.05,
+    ):
+        self.app = app
+        self.paths: List[Pattern] = [re.compile(p) for p in paths]
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or not any(p.fullmatch(scope["path"]) for p in self.paths)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        idempotency_key = headers.get(b"idempotency-key")
+        if not idempotency_key:
+            await self.app(scope, receive, send)
+            return
+
+        from app.db import db
+
+        service = IdempotencyService(db)
+        body = await self._read_body(receive)
+        # Scope keys per caller and route so keys can't collide across users.
+        key = hashlib.sha256(
+            b"\0".join(
+                [
+                    headers.get(b"authorization", b""),
+                    scope["path"].encode(),
+                    idempotency_key,
+                ]
+            )
+        ).hexdigest()
+        fingerprint = hashlib.sha256(body).hexdigest()
+
+        existing = await service.begin(key, fingerprint)
+        if existing is not None:
+            response = await self._replay(
+                service,
+                key,
+                existing,
+                fingerprint,
+                headers.get(b"accept-encoding", b"").decode("latin-1"),
+            )
+            await response(scope, receive, send)
+            return
+
+        status_code = 500
+        response_headers = []
+        chunks = []
+
+        async def replay_receive() -> Message:
+            nonlocal body
+            if body is not None:
+                message = {"type": "http.request", "body": body, "more_body": False}
+                body = None
+                return message
+            return await receive()
+
+        async def capture_send(message: Message):
+            nonlocal status_code, response_headers
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                response_headers = [
+                    (k.decode("latin-1"), v.decode("latin-1"))
+                    for k, v in message.get("headers", [])
+                    if k.lower() not in _SKIP_HEADERS
+                ]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+        except BaseException:
+            await service.abandon(key)
+            raise
+
+        if _is_final(status_code):
+            await service.complete(key, status_code, response_headers, b"".join(chunks))
+        else:
+            # Server errors, transient 4xx and disconnects are not final; let
+            # the client retry for real.
+            await service.abandon(key)
+
+    async def _replay(
+        self,
+        service: IdempotencyService,
+        key: str,
+        record: dict,
+        fingerprint: str,
+        accept_encoding: str,
+    ) -> Response:
+        if record["fingerprint"] != fingerprint:
+            return JSONResponse(
+                {"detail": "Idempotency-Key was already used with a different request"},
+                status_code=422,
+            )
+
+        deadline = time.monotonic() + self.wait_timeout
+        while record and record["status"] == "in_progress":
+            if time.monotonic() >= deadline:
+                return JSONResponse(
+                    {"detail": "A request with this Idempotency-Key is in progress"},
+                    status_code=409,
+                    headers={"Retry-After": "1"},
+                )
+            await asyncio.sleep(self.poll_interval)
+            record = await service.get(key)
+
+        if not record:
+            return JSONResponse(
+                {"detail": "The original request failed, please retry"},
+                status_code=409,
+                headers={"Retry-After": "1"},
+            )
+
+        stored = record["response"]
+        body, headers = bytes(stored["body"]), stored["headers"]
+        encoding = next(
+            (v for k, v in headers if k.lower() == "content-encoding"), None
+        )
+        if encoding and not accepts(accept_encoding, encoding):
+            # Stored for a client with different codecs; fall back to identity.
+            body = decompress(body, encoding)
+            if body is None:
+                # Re-running would repeat the original request's side effects.
+                return JSONResponse(
+                    {
+                        "detail": f"The stored response is {encoding}-encoded; "
+                        f"retry with Accept-Encoding: {encoding}"
+                    },
+                    status_code=406,
+                )
+            headers = [(k, v) for k, v in headers if k.lower() != "content-encoding"]
+        response = Response(content=body, status_code=stored["status_code"])
+        for name, value in headers:
+            response.headers.append(name, value)
+        response.headers["Idempotent-Replayed"] = "true"
+        return response
+
+    @staticmethod
+    async def _read_body(receive: Receive) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks)
@@ -0,0 +1,103 @@
+"""Server-Timing header and structured request timing logs."""
+
+import json
+import logging
+
+from pymongo import monitoring
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.timing import record, start_request_timings
+
+logger = logging.getLogger("app.requests")
+
+# Attributes every LogRecord has; anything else was passed through ``extra``.
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class RequestLogFormatter(logging.Formatter):
+    """One JSON object per record: the message plus its ``extra`` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        entry.update(
+            (key, value)
+            for key, value in vars(record).items()
+            if key not in _RECORD_ATTRS
+        )
+        return json.dumps(entry, default=str)
+
+
+def configure_request_logging(level: str = "INFO"):
+    """Send ``app.requests`` records to stderr as JSON lines.
+
+    uvicorn only configures its own loggers, so without this the INFO
+    records fall through to the unconfigured root logger and are dropped.
+    """
+    logger.setLevel(level.upper())
+    if not any(isinstance(h.formatter, RequestLogFormatter) for h in logger.handlers):
+        handler = logging.StreamHandler()
+        handler.setFormatter(RequestLogFormatter())
+        logger.addHandler(handler)
+    # Don't repeat the records through handlers on the root logger.
+    logger.propagate = False
+
+
+class ServerTimingMiddleware:
+    """Collect stage timings per request and emit them as header and log fields."""
+
+    def __init__(self, app: ASGIApp, emit_header: bool = True):
+        self.app = app
+        self.emit_header = emit_header
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = start_request_timings()
+        status_code = 500
+
+        async def send_with_timing(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.emit_header:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", timings.server_timing_header())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            route = scope.get("route")
+            logger.info(
+                "request",
+                extra={
+                    "method": scope["method"],
+                    "path": getattr(route, "path", scope["path"]),
+                    "status": status_code,
+                    **timings.as_log_fields(),
+                },
+            )
+
+
+class CommandTimingListener(monitoring.CommandListener):
+    """Adds MongoDB command durations to the current request's ``db`` stage.
+
+    Motor runs commands on executor threads with the caller's context copied,
+    so the request's timings object is visible here.
+    """
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        record("db", event.duration_micros / 1000)
+
+    def failed(self, event):
+        record("db", event.duration_micros / 1000)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 
@@ -12,7 +12,52 @@ class ProductBase(BaseModel):
     average_rating: Optional[float] = None
 
 
+class RecentReview(BaseModel):
+    id: str
+    reviewer_id: Optional[str] = None
+    reviewer_name: Optional[str] = None
+    rating: Optional[int] = None
+    comment: Optional[str] = None
+    createdAt: Optional[datetime] = None
+
+
 class ProductRead(ProductBase):
     id: str
+    recent_reviews: List[RecentReview] = []
+    rating_histogram: Dict[str, int] = {}
     createdAt: Optional[datetime] = None
     updatedAt: Optional[datetime] = None
+
+
+class ProductPage(BaseModel):
+    items: List[ProductRead] = []
+    next_cursor: Optional[str] = None
+
+
+class ProductFacets(BaseModel):
+    total: int = 0
+    categories: Dict[str, int] = {}
+    price_buckets: Dict[str, int] = {}
+    rating_bands: Dict[str, int] = {}
+
+
+class LeaderboardEntry(BaseModel):
+    product_id: str
+    name: Optional[str] = None
+    category: Optional[str] = None
+    average_rating: float
+    review_count: int
+    score: float
+
+
+class RatingTrendPoint(BaseModel):
+    day: datetime
+    count: int
+    average_rating: float
+
+
+class SimilarProduct(BaseModel):
+    product_id: str
+    name: Optional[str] = None
+    score: float
+    co_reviewers: int
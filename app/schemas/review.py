@@ -26,3 +26,9 @@ class ReviewRead(ReviewBase):
 class ReviewProductResp(BaseModel):
     average_rating: Optional[float] = 0
     reviews: List[ReviewRead] = []
+
+
+class ReviewPage(BaseModel):
+    items: List[ReviewRead] = []
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
@@ -0,0 +1,119 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Optional
+from datetime import datetime, timezone
+
+from app.core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class ActivityLog:
+    """Buffered write-behind audit log.
+
+    ``record`` only appends to an in-memory bounded buffer; a background task
+    flushes it with ``insert_many`` when ``activity_batch_size`` entries are
+    waiting or every ``activity_flush_interval_seconds``. When the buffer is
+    full, ``activity_overflow_policy`` decides between dropping the entry
+    (counted in ``dropped``) and making the caller wait for space.
+    """
+
+    collection_name = "activity_log"
+
+    def __init__(self):
+        self.db = None
+        self.dropped = 0
+        self._buffer: deque = deque()
+        self._capacity = settings.activity_buffer_size
+        self._flush_needed = asyncio.Event()
+        self._space_available = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    async def ensure_indexes(self, db):
+        """Create indexes used to query the audit trail."""
+        collection = db[self.collection_name]
+        await collection.create_index([("actor_id", 1), ("at", -1)])
+        await collection.create_index([("target_type", 1), ("target_id", 1), ("at", -1)])
+
+    def start(self, db):
+        """Start flushing to ``db`` in the background."""
+        self.db = db
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flusher and drain whatever is still buffered."""
+        self._stopping = True
+        self._flush_needed.set()
+        if self._task:
+            await self._task
+            self._task = None
+
+    async def record(
+        self,
+        action: str,
+        actor_id: Optional[str] = None,
+        target_type: Optional[str] = None,
+        target_id: Optional[str] = None,
+        **details,
+    ):
+        """Queue an audit entry; never waits on the database."""
+        entry = {
+            "action": action,
+            "actor_id": actor_id,
+            "target_type": target_type,
+            "target_id": target_id,
+            "at": datetime.now(timezone.utc),
+        }
+        if details:
+            entry["details"] = details
+
+        while len(self._buffer) >= self._capacity:
+            if settings.activity_overflow_policy != "block" or self._stopping:
+                self.dropped += 1
+                return
+            self._space_available.clear()
+            self._flush_needed.set()
+            await self._space_available.wait()
+
+        self._buffer.append(entry)
+        if len(self._buffer) >= settings.activity_batch_size:
+            self._flush_needed.set()
+
+    def stats(self) -> dict:
+        return {
+            "buffered": len(self._buffer),
+            "capacity": self._capacity,
+            "dropped": self.dropped,
+        }
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(
+                    self._flush_needed.wait(),
+                    timeout=settings.activity_flush_interval_seconds,
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._flush_needed.clear()
+            await self._flush()
+        await self._flush()
+
+    async def _flush(self):
+        while self._buffer:
+            count = min(len(self._buffer), settings.activity_batch_size)
+            batch = [self._buffer.popleft() for _ in range(count)]
+            self._space_available.set()
+            try:
+                await self.db[self.collection_name].insert_many(batch, ordered=False)
+            except Exception:
+                logger.exception("Failed to write %d activity entries", len(batch))
+                self.dropped += len(batch)
+                return
+
+
+activity_log = ActivityLog()
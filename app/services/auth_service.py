@@ -1,15 +1,30 @@
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Tuple
+import asyncio
+import hashlib
+import logging
 import secrets
-from passlib.context import CryptContext
-from jose import JWTError, jwt, ExpiredSignatureError
+from functools import lru_cache
 
-from app.core.config import Settings
+from pymongo.errors import DuplicateKeyError
+
+from app.core.config import get_settings
 from app.schemas.auth import TokenData
 
-settings = Settings()
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+@lru_cache
+def get_pwd_context():
+    """Build the password context on first use.
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    passlib/bcrypt are only needed by login and registration, so they are
+    not imported until then.
+    """
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 class AuthError(Exception):
@@ -57,21 +72,39 @@ class AuthService:
         """Initialize service with database instance."""
         self.db = db
 
+    async def ensure_indexes(self):
+        """Create indexes used by token lookups, session caps and compaction."""
+        collection = self.db[self.collection_name]
+        await collection.create_index("token", unique=True)
+        await collection.create_index(
+            [("user_id", 1), ("revoked_at", 1), ("created_at", -1)]
+        )
+        await collection.create_index("expires_at")
+        await collection.create_index("revoked_at")
+        # One token per login Idempotency-Key, so retries don't add sessions.
+        await collection.create_index(
+            [("user_id", 1), ("request_key", 1)],
+            unique=True,
+            partialFilterExpression={"request_key": {"$exists": True}},
+        )
+
     @staticmethod
     def verify_password(plain_password: str, hashed_password: str) -> bool:
         """Verify a password against its hash."""
-        return pwd_context.verify(plain_password, hashed_password)
+        return get_pwd_context().verify(plain_password, hashed_password)
 
     @staticmethod
     def get_password_hash(password: str) -> str:
         """Hash a password for storing."""
-        return pwd_context.hash(password)
+        return get_pwd_context().hash(password)
 
     @staticmethod
     def create_access_token(
         data: dict, expires_delta: Optional[timedelta] = None
     ) -> str:
         """Create JWT access token."""
+        from jose import jwt
+
         try:
             to_encode = data.copy()
             if expires_delta:
@@ -89,9 +122,17 @@ class AuthService:
             raise TokenGenerationError(f"Failed to generate access token: {str(e)}")
 
     async def create_refresh_token(
-        self, user_id: str, expires_at: Optional[datetime] = None
+        self,
+        user_id: str,
+        expires_at: Optional[datetime] = None,
+        request_key: Optional[str] = None,
     ) -> str:
-        """Create random refresh token and store in DB."""
+        """Create random refresh token and store in DB.
+
+        ``request_key`` is a login's ``Idempotency-Key``: a retry with the
+        same key gets the token the first attempt issued (while it is still
+        valid) instead of a second session.
+        """
         try:
             token = secrets.token_urlsafe(32)
             if expires_at is None:
@@ -109,6 +150,15 @@ class AuthService:
                 "created_at": now,
                 "revoked_at": None,
             }
+            if request_key is not None:
+                data["request_key"] = hashlib.sha256(request_key.encode()).hexdigest()
+                try:
+                    await self.db[self.collection_name].insert_one(data)
+                    return token
+                except DuplicateKeyError:
+                    issued = await self._token_for_request(user_id, data["request_key"])
+                    if issued:
+                        return issued
 
             result = await self.db[self.collection_name].insert_one(data)
             if not result.acknowledged:
@@ -117,9 +167,30 @@ class AuthService:
         except Exception as e:
             raise TokenGenerationError(f"Failed to generate refresh token: {str(e)}")
 
+    async def _token_for_request(self, user_id: str, request_key: str) -> Optional[str]:
+        """Return the still valid token issued for ``request_key``.
+
+        A revoked or expired one gives up the key so a new token can take it.
+        """
+        collection = self.db[self.collection_name]
+        doc = await collection.find_one(
+            {"user_id": user_id, "request_key": request_key}
+        )
+        if not doc:
+            return None
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        if doc["revoked_at"] is None and doc["expires_at"] > now:
+            return doc["token"]
+        await collection.update_one(
+            {"_id": doc["_id"]}, {"$unset": {"request_key": ""}}
+        )
+        return None
+
     @staticmethod
     def verify_token(token: str, token_type: str = "access") -> TokenData:
         """Verify and decode JWT token."""
+        from jose import JWTError, jwt, ExpiredSignatureError
+
         try:
             payload = jwt.decode(
                 token, key=settings.secret_key, algorithms=[settings.algorithm]
@@ -211,3 +282,107 @@ class AuthService:
             return result.modified_count
         except Exception as e:
             raise TokenGenerationError(f"Failed to revoke user refresh tokens: {str(e)}")
+
+    async def enforce_session_cap(self, user_id: str) -> int:
+        """Revoke the oldest active sessions beyond ``max_sessions_per_user``."""
+        cap = settings.max_sessions_per_user
+        if cap <= 0:
+            return 0
+        try:
+            now = datetime.now(timezone.utc)
+            docs = (
+                await self.db[self.collection_name]
+                .find({"user_id": user_id, "revoked_at": None}, {"_id": 1})
+                .sort("created_at", -1)
+                .skip(cap)
+                .to_list(length=None)
+            )
+            if not docs:
+                return 0
+            result = await self.db[self.collection_name].update_many(
+                {"_id": {"$in": [doc["_id"] for doc in docs]}, "revoked_at": None},
+                {"$set": {"revoked_at": now}},
+            )
+            return result.modified_count
+        except Exception as e:
+            raise TokenGenerationError(f"Failed to enforce session limit: {str(e)}")
+
+    async def compact_refresh_tokens(self, batch_size: int) -> int:
+        """Delete one batch of revoked or expired refresh tokens.
+
+        Revoked tokens are kept for ``refresh_token_retention_hours`` before
+        being removed. Returns the number of tokens deleted.
+        """
+        now = datetime.now(timezone.utc)
+        cutoff = now - timedelta(hours=settings.refresh_token_retention_hours)
+        docs = (
+            await self.db[self.collection_name]
+            .find(
+                {
+                    "$or": [
+                        {"revoked_at": {"$lte": cutoff}},
+                        {"expires_at": {"$lte": now}},
+                    ]
+                },
+                {"_id": 1},
+            )
+            .limit(batch_size)
+            .to_list(length=batch_size)
+        )
+        if not docs:
+            return 0
+        result = await self.db[self.collection_name].delete_many(
+            {"_id": {"$in": [doc["_id"] for doc in docs]}}
+        )
+        return result.deleted_count
+
+
+class RefreshTokenCompactor:
+    """Background task that periodically compacts the refresh token store."""
+
+    def __init__(self, db):
+        """Initialize compactor with database instance."""
+        self.auth_service = AuthService(db)
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    def start(self):
+        """Start compacting in the background."""
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop compacting and wait for the current batch to finish."""
+        self._stopping.set()
+        if self._task:
+            await self._task
+            self._task = None
+
+    async def run_once(self) -> int:
+        """Delete revoked/expired tokens in throttled batches until none remain."""
+        total = 0
+        while not self._stopping.is_set():
+            deleted = await self.auth_service.compact_refresh_tokens(
+                settings.token_compaction_batch_size
+            )
+            total += deleted
+            if deleted < settings.token_compaction_batch_size:
+                break
+            await self._sleep(settings.token_compaction_batch_delay_seconds)
+        return total
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                deleted = await self.run_once()
+                if deleted:
+                    logger.info("Compacted %d refresh tokens", deleted)
+            except Exception:
+                logger.exception("Refresh token compaction failed")
+            await self._sleep(settings.token_compaction_interval_seconds)
+
+    async def _sleep(self, seconds: float):
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
@@ -0,0 +1,40 @@
+from typing import Dict, Iterable, Optional
+from bson import ObjectId
+
+
+class BatchLoader:
+    """Request-scoped batching loader for a single field of a collection.
+
+    Collects ids, fetches the missing ones with one ``$in`` query and keeps
+    the results for the lifetime of the loader, so rendering a page of N
+    reviews costs one query per collection instead of N.
+    """
+
+    def __init__(self, db, collection_name: str, field: str):
+        """Initialize loader with database instance, collection and field."""
+        self.db = db
+        self.collection_name = collection_name
+        self.field = field
+        self._cache: Dict[str, Optional[str]] = {}
+
+    async def load_many(self, ids: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Return ``{id: value}`` for the given ids, fetching uncached ones."""
+        ids = {i for i in ids if i}
+        missing = {}
+        for id_ in ids - self._cache.keys():
+            try:
+                missing[ObjectId(id_)] = id_
+            except Exception:
+                self._cache[id_] = None
+
+        if missing:
+            cursor = self.db[self.collection_name].find(
+                {"_id": {"$in": list(missing)}}, {self.field: 1}
+            )
+            async for doc in cursor:
+                self._cache[missing.pop(doc["_id"])] = doc.get(self.field)
+            # Remember misses too so they aren't queried again.
+            for id_ in missing.values():
+                self._cache[id_] = None
+
+        return {i: self._cache[i] for i in ids}
@@ -0,0 +1,296 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from app.core.config import get_settings
+from app.db import supports_snapshot_reads
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+UNKNOWN_VALUE = "unknown"
+UNCATEGORIZED_VALUE = "uncategorized"
+UNRATED_VALUE = "unrated"
+RATING_BANDS = [1, 2, 3, 4, 5]
+# Marker document holding the rebuild lock and whether counters were built.
+STATE_FACET = "_state"
+STATE_VALUE = "rebuild"
+REBUILD_LEASE_SECONDS = 600
+
+
+class FacetService:
+    """Materialized facet counts for the product catalog.
+
+    Each facet value is stored as its own counter document
+    ``{facet, value, count}`` so writes can ``$inc`` a single counter and
+    reads only touch the (small) summary collection, never ``products``.
+    A marker document records whether the counters were ever built from the
+    catalog and serializes rebuilds.
+    """
+
+    collection_name = "product_facets"
+    product_collection_name = "products"
+
+    def __init__(self, db):
+        """Initialize service with database instance."""
+        self.db = db
+
+    async def ensure_indexes(self):
+        """Create indexes used by facet counters."""
+        await self.db[self.collection_name].create_index(
+            [("facet", 1), ("value", 1)], unique=True
+        )
+
+    async def ensure_built(self):
+        """Build the counters from the catalog unless that was already done.
+
+        Runs at startup: counters that were only ever ``$inc``-ed would miss
+        every product that existed before them.
+        """
+        state = await self.db[self.collection_name].find_one(
+            {"facet": STATE_FACET, "value": STATE_VALUE}
+        )
+        if not (state and state.get("built")):
+            await self.rebuild()
+
+    async def get_facets(self) -> dict:
+        """Return facet counts from the materialized summary."""
+        query = {"$or": [{"count": {"$gt": 0}}, {"facet": STATE_FACET}]}
+        docs = await self.db[self.collection_name].find(
+            query, {"_id": 0}
+        ).to_list(length=None)
+        if not any(doc["facet"] == STATE_FACET and doc.get("built") for doc in docs):
+            # Startup normally builds the summary; cover a skipped warmup.
+            await self.rebuild()
+            docs = await self.db[self.collection_name].find(
+                query, {"_id": 0}
+            ).to_list(length=None)
+
+        facets = {"total": 0, "categories": {}, "price_buckets": {}, "rating_bands": {}}
+        for doc in docs:
+            if doc["facet"] == "total":
+                facets["total"] = doc["count"]
+            elif doc["facet"] in facets:
+                facets[doc["facet"]][doc["value"]] = doc["count"]
+        return facets
+
+    async def apply_change(self, before: Optional[dict], after: Optional[dict]):
+        """Incrementally update counters for a product change.
+
+        ``before`` is the document prior to the change (None on insert) and
+        ``after`` the document afterwards (None on delete).
+        """
+        deltas: Dict[tuple, int] = {}
+        for doc, step in ((before, -1), (after, 1)):
+            if doc is None:
+                continue
+            for key in self._facet_keys(doc):
+                deltas[key] = deltas.get(key, 0) + step
+
+        for (facet, value), delta in deltas.items():
+            if delta == 0:
+                continue
+            await self.db[self.collection_name].update_one(
+                {"facet": facet, "value": value},
+                {"$inc": {"count": delta}},
+                upsert=True,
+            )
+
+    async def rebuild(self) -> bool:
+        """Recompute all counters from the catalog with a ``$facet`` aggregation.
+
+        Only one rebuild runs at a time (a leased lock on the marker
+        document); returns False if another one holds it. The catalog and the
+        counters are read at one snapshot and each counter gets an ``$inc`` by
+        the difference, so ``apply_change`` increments landing meanwhile are
+        kept rather than overwritten. On a standalone server (no snapshot
+        reads) the rebuild is only exact without concurrent product writes.
+        """
+        owner = ObjectId()
+        if not await self._acquire_rebuild_lock(owner):
+            return False
+        try:
+            await self._reconcile_counters()
+            await self.db[self.collection_name].update_one(
+                {"facet": STATE_FACET, "value": STATE_VALUE, "owner": owner},
+                {"$set": {"built": True, "lockedUntil": None}},
+            )
+        except BaseException:
+            await self.db[self.collection_name].update_one(
+                {"facet": STATE_FACET, "value": STATE_VALUE, "owner": owner},
+                {"$set": {"lockedUntil": None}},
+            )
+            raise
+        return True
+
+    async def _acquire_rebuild_lock(self, owner: ObjectId) -> bool:
+        now = datetime.now(timezone.utc)
+        try:
+            await self.db[self.collection_name].find_one_and_update(
+                {
+                    "facet": STATE_FACET,
+                    "value": STATE_VALUE,
+                    "$or": [
+                        {"lockedUntil": None},
+                        {"lockedUntil": {"$lte": now}},
+                    ],
+                },
+                {
+                    "$set": {
+                        "owner": owner,
+                        "lockedUntil": now
+                        + timedelta(seconds=REBUILD_LEASE_SECONDS),
+                    }
+                },
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # The marker exists and its lock is held by another rebuild.
+            return False
+        return True
+
+    async def _reconcile_counters(self):
+        collection = self.db[self.collection_name]
+        snapshot = await supports_snapshot_reads(self.db)
+        if not snapshot:
+            logger.warning(
+                "Rebuilding facets without a snapshot (standalone server); "
+                "product writes during the rebuild may be miscounted"
+            )
+
+        expected: Dict[tuple, int] = {}
+        stored: Dict[tuple, int] = {}
+        async with await self.db.client.start_session(snapshot=snapshot) as session:
+            for facet, value, count in await self._compute_counters(session):
+                expected[(facet, value)] = expected.get((facet, value), 0) + count
+            async for doc in collection.find(
+                {"facet": {"$ne": STATE_FACET}},
+                {"_id": 0, "facet": 1, "value": 1, "count": 1},
+                session=session,
+            ):
+                stored[(doc["facet"], doc["value"])] = doc.get("count", 0)
+
+        # Values that no longer occur in the catalog are corrected to zero.
+        corrections = []
+        for facet, value in expected.keys() | stored.keys():
+            delta = expected.get((facet, value), 0) - stored.get((facet, value), 0)
+            if delta:
+                corrections.append(
+                    UpdateOne(
+                        {"facet": facet, "value": value},
+                        {"$inc": {"count": delta}},
+                        upsert=True,
+                    )
+                )
+        if corrections:
+            await collection.bulk_write(corrections, ordered=False)
+
+    async def _compute_counters(self, session=None) -> List[tuple]:
+        boundaries = self._price_boundaries()
+        pipeline = [
+            {
+                "$facet": {
+                    "total": [{"$count": "count"}],
+                    # Missing, null and "" all count as uncategorized.
+                    "categories": [
+                        {
+                            "$sortByCount": {
+                                "$cond": [
+                                    {"$eq": [{"$ifNull": ["$category", ""]}, ""]},
+                                    UNCATEGORIZED_VALUE,
+                                    "$category",
+                                ]
+                            }
+                        }
+                    ],
+                    "price_buckets": [
+                        {
+                            "$bucket": {
+                                "groupBy": "$price",
+                                "boundaries": boundaries + [float("inf")],
+                                "default": UNKNOWN_VALUE,
+                            }
+                        }
+                    ],
+                    "rating_bands": [
+                        {
+                            "$bucket": {
+                                "groupBy": "$average_rating",
+                                "boundaries": RATING_BANDS + [float("inf")],
+                                "default": UNRATED_VALUE,
+                            }
+                        }
+                    ],
+                }
+            }
+        ]
+        result = await self.db[self.product_collection_name].aggregate(
+            pipeline, session=session
+        ).to_list(length=1)
+        summary = result[0] if result else {}
+
+        counters = []
+        total = summary.get("total") or [{"count": 0}]
+        counters.append(("total", "all", total[0]["count"]))
+        for doc in summary.get("categories", []):
+            counters.append(
+                ("categories", self._category_value(doc["_id"]), doc["count"])
+            )
+        for doc in summary.get("price_buckets", []):
+            value = doc["_id"]
+            if value != UNKNOWN_VALUE:
+                value = self._price_label(value)
+            counters.append(("price_buckets", value, doc["count"]))
+        for doc in summary.get("rating_bands", []):
+            value = doc["_id"]
+            if value != UNRATED_VALUE:
+                value = str(int(value))
+            counters.append(("rating_bands", value, doc["count"]))
+        return counters
+
+    @classmethod
+    def _facet_keys(cls, doc: dict) -> List[tuple]:
+        """Return the (facet, value) counters a product document contributes to."""
+        return [
+            ("total", "all"),
+            ("categories", cls._category_value(doc.get("category"))),
+            ("price_buckets", cls._price_value(doc.get("price"))),
+            ("rating_bands", cls._rating_value(doc.get("average_rating"))),
+        ]
+
+    @staticmethod
+    def _category_value(category: Optional[str]) -> str:
+        return category if category else UNCATEGORIZED_VALUE
+
+    @staticmethod
+    def _price_boundaries() -> List[int]:
+        return sorted(settings.facet_price_boundaries)
+
+    @classmethod
+    def _price_label(cls, lower: int) -> str:
+        boundaries = cls._price_boundaries()
+        index = boundaries.index(lower)
+        if index + 1 < len(boundaries):
+            return f"{lower}-{boundaries[index + 1]}"
+        return f"{lower}+"
+
+    @classmethod
+    def _price_value(cls, price: Optional[int]) -> str:
+        boundaries = cls._price_boundaries()
+        if price is None or not boundaries or price < boundaries[0]:
+            return UNKNOWN_VALUE
+        lower = boundaries[0]
+        for boundary in boundaries:
+            if price >= boundary:
+                lower = boundary
+        return cls._price_label(lower)
+
+    @staticmethod
+    def _rating_value(rating: Optional[float]) -> str:
+        if not rating or rating < RATING_BANDS[0]:
+            return UNRATED_VALUE
+        return str(min(int(rating), RATING_BANDS[-1]))
@@ -0,0 +1,87 @@
+from typing import Optional
+from datetime import datetime, timedelta, timezone
+from bson import Binary
+from pymongo.errors import DuplicateKeyError
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+
+class IdempotencyService:
+    """Stored responses for ``Idempotency-Key`` requests, expired by a TTL index."""
+
+    collection_name = "idempotency_keys"
+
+    def __init__(self, db):
+        """Initialize service with database instance."""
+        self.db = db
+
+    async def ensure_indexes(self):
+        """Create the TTL index that expires stored responses."""
+        await self.db[self.collection_name].create_index(
+            "createdAt", expireAfterSeconds=settings.idempotency_ttl_seconds
+        )
+
+    async def begin(self, key: str, fingerprint: str) -> Optional[dict]:
+        """Claim ``key`` for a new request.
+
+        Returns None if the caller now owns the key, otherwise the existing
+        record (in progress or completed). An in-progress claim holds a
+        ``lockedUntil`` lease; once it has expired (the owner crashed or was
+        killed) the key can be claimed again by a request with the same body.
+        """
+        now = datetime.now(timezone.utc)
+        locked_until = now + timedelta(seconds=settings.idempotency_lease_seconds)
+        try:
+            await self.db[self.collection_name].insert_one(
+                {
+                    "_id": key,
+                    "fingerprint": fingerprint,
+                    "status": "in_progress",
+                    "lockedUntil": locked_until,
+                    "createdAt": now,
+                }
+            )
+            return None
+        except DuplicateKeyError:
+            pass
+
+        reclaimed = await self.db[self.collection_name].find_one_and_update(
+            {
+                "_id": key,
+                "fingerprint": fingerprint,
+                "status": "in_progress",
+                "lockedUntil": {"$lte": now},
+            },
+            {"$set": {"lockedUntil": locked_until, "createdAt": now}},
+        )
+        if reclaimed:
+            return None
+        return await self.get(key)
+
+    async def get(self, key: str) -> Optional[dict]:
+        """Fetch the record for ``key``."""
+        return await self.db[self.collection_name].find_one({"_id": key})
+
+    async def complete(self, key: str, status_code: int, headers: list, body: bytes):
+        """Store the response so repeated requests can replay it."""
+        await self.db[self.collection_name].update_one(
+            {"_id": key},
+            {
+                "$set": {
+                    "status": "completed",
+                    "response": {
+                        "status_code": status_code,
+                        "headers": [[k, v] for k, v in headers],
+                        "body": Binary(body),
+                    },
+                }
+            },
+        )
+
+    async def abandon(self, key: str):
+        """Forget an in-progress key so the request can be retried."""
+        await self.db[self.collection_name].delete_one(
+            {"_id": key, "status": "in_progress"}
+        )
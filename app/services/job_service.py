@@ -0,0 +1,228 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Optional
+from datetime import datetime, timedelta, timezone
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[object, dict], Awaitable[None]]
+
+
+class JobService:
+    """Persistent background job queue stored in MongoDB.
+
+    Jobs are claimed with a lease. A job whose lease expired (e.g. the
+    worker process restarted) is claimed again and resumes from the
+    ``progress`` it last saved.
+    """
+
+    collection_name = "jobs"
+
+    def __init__(self, db):
+        """Initialize service with database instance."""
+        self.db = db
+
+    async def ensure_indexes(self):
+        """Create indexes used to claim, deduplicate and expire jobs."""
+        collection = self.db[self.collection_name]
+        await collection.create_index([("status", 1), ("run_after", 1)])
+        # Only finished (done, failed, superseded) jobs have finishedAt.
+        await collection.create_index(
+            "finishedAt", expireAfterSeconds=settings.job_retention_seconds
+        )
+        await collection.create_index(
+            [("type", 1), ("key", 1)],
+            unique=True,
+            partialFilterExpression={"status": "pending"},
+        )
+
+    async def enqueue(self, job_type: str, key: str, payload: dict):
+        """Enqueue a job. Pending jobs with the same type and key are merged.
+
+        Merging restarts the pending job's progress, since the new payload
+        supersedes whatever was already applied.
+        """
+        now = datetime.now(timezone.utc)
+        await self.db[self.collection_name].update_one(
+            {"type": job_type, "key": key, "status": "pending"},
+            {
+                "$set": {"payload": payload, "progress": {}, "updatedAt": now},
+                "$setOnInsert": {
+                    "attempts": 0,
+                    "run_after": now,
+                    "createdAt": now,
+                },
+            },
+            upsert=True,
+        )
+
+    async def claim(self) -> Optional[dict]:
+        """Claim the next runnable job, including jobs with an expired lease."""
+        now = datetime.now(timezone.utc)
+        return await self.db[self.collection_name].find_one_and_update(
+            {
+                "$or": [
+                    {"status": "pending", "run_after": {"$lte": now}},
+                    {"status": "running", "lease_expires_at": {"$lte": now}},
+                ]
+            },
+            {
+                "$set": {
+                    "status": "running",
+                    "lease_expires_at": self._lease_expiry(),
+                    "updatedAt": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("run_after", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def save_progress(self, job: dict, progress: dict):
+        """Persist job progress and extend its lease."""
+        job["progress"] = progress
+        await self.db[self.collection_name].update_one(
+            {"_id": job["_id"]},
+            {
+                "$set": {
+                    "progress": progress,
+                    "lease_expires_at": self._lease_expiry(),
+                    "updatedAt": datetime.now(timezone.utc),
+                }
+            },
+        )
+
+    async def complete(self, job: dict):
+        """Mark a job as done."""
+        now = datetime.now(timezone.utc)
+        await self.db[self.collection_name].update_one(
+            {"_id": job["_id"]},
+            {"$set": {"status": "done", "finishedAt": now, "updatedAt": now}},
+        )
+
+    async def fail(self, job: dict, error: str):
+        """Mark a job as failed, or reschedule it while attempts remain."""
+        now = datetime.now(timezone.utc)
+        if job.get("attempts", 0) < settings.job_max_attempts:
+            update = {
+                "status": "pending",
+                "run_after": now + timedelta(seconds=settings.job_retry_delay_seconds),
+            }
+        else:
+            update = {"status": "failed", "finishedAt": now}
+        update.update({"error": error, "updatedAt": now})
+        await self._set_status(job, update)
+
+    async def release(self, job: dict):
+        """Return a running job to the queue so it resumes from its progress."""
+        now = datetime.now(timezone.utc)
+        await self._set_status(
+            job, {"status": "pending", "run_after": now, "updatedAt": now}
+        )
+
+    async def _set_status(self, job: dict, update: dict):
+        try:
+            await self.db[self.collection_name].update_one(
+                {"_id": job["_id"]}, {"$set": update}
+            )
+        except DuplicateKeyError:
+            # A newer pending job for the same key exists; let it supersede.
+            now = update["updatedAt"]
+            await self.db[self.collection_name].update_one(
+                {"_id": job["_id"]},
+                {"$set": {"status": "superseded", "finishedAt": now, "updatedAt": now}},
+            )
+
+    @staticmethod
+    def _lease_expiry() -> datetime:
+        return datetime.now(timezone.utc) + timedelta(seconds=settings.job_lease_seconds)
+
+
+class JobWorker:
+    """In-process worker that polls the job queue and runs registered handlers."""
+
+    handlers: Dict[str, JobHandler] = {}
+
+    def __init__(self, db):
+        """Initialize worker with database instance."""
+        self.db = db
+        self.jobs = JobService(db)
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    @classmethod
+    def register(cls, job_type: str):
+        """Decorator registering a handler ``async def handler(jobs, job)``."""
+
+        def decorator(func: JobHandler) -> JobHandler:
+            cls.handlers[job_type] = func
+            return func
+
+        return decorator
+
+    def start(self):
+        """Start polling in the background."""
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop polling and wait for the current batch to finish."""
+        self._stopping.set()
+        if self._task:
+            await self._task
+            self._task = None
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            job = None
+            try:
+                job = await self.jobs.claim()
+                if job is None:
+                    await self._sleep(settings.job_poll_interval_seconds)
+                    continue
+
+                handler = self.handlers.get(job["type"])
+                if handler is None:
+                    raise RuntimeError(f"No handler for job type {job['type']}")
+                await handler(self, job)
+                if self._stopping.is_set():
+                    await self.jobs.release(job)
+                else:
+                    await self.jobs.complete(job)
+            except Exception as e:
+                logger.exception("Background job failed")
+                if job is not None:
+                    await self._record_failure(job, e)
+                await self._sleep(settings.job_poll_interval_seconds)
+
+    async def _record_failure(self, job: dict, error: Exception):
+        """Record a failed attempt without letting a database error stop the worker.
+
+        If the failure can't be written, the job stays ``running`` and is
+        claimed again (by any worker) once its lease expires.
+        """
+        try:
+            await self.jobs.fail(job, str(error))
+        except Exception:
+            logger.exception("Could not record failure of job %s", job["_id"])
+
+    async def _sleep(self, seconds: float):
+        """Sleep unless the worker is asked to stop."""
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    @property
+    def stopping(self) -> bool:
+        """True once ``stop`` was called; handlers should return early."""
+        return self._stopping.is_set()
+
+    async def throttle(self):
+        """Pause between batches so background work doesn't starve requests."""
+        await self._sleep(settings.job_batch_delay_seconds)
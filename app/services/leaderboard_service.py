@@ -0,0 +1,170 @@
+from typing import List, Optional
+from datetime import datetime, timezone
+from bson import ObjectId
+
+from app.core.config import get_settings
+from app.schemas.product import LeaderboardEntry
+
+settings = get_settings()
+
+
+class LeaderboardService:
+    """Materialized top-rated leaderboard per category.
+
+    One document per ranked product, keyed by ``product_id`` and indexed on
+    ``(category, score)`` so the top-k of a category is a single index scan
+    (and on ``score`` for the top-k across all categories).
+    """
+
+    collection_name = "category_leaderboard"
+
+    def __init__(self, db):
+        """Initialize service with database instance."""
+        self.db = db
+
+    async def ensure_indexes(self):
+        """Create indexes used by leaderboard reads and updates."""
+        collection = self.db[self.collection_name]
+        await collection.create_index("product_id", unique=True)
+        await collection.create_index(
+            [("category", 1), ("score", -1), ("review_count", -1)]
+        )
+        await collection.create_index([("score", -1), ("review_count", -1)])
+
+    async def get_top_rated(
+        self, category: Optional[str], limit: int = 10
+    ) -> List[LeaderboardEntry]:
+        """Fetch the top-k products of a category (or of all, if None) by score."""
+        query = {} if category is None else {"category": category}
+        cursor = (
+            self.db[self.collection_name]
+            .find(query, {"_id": 0})
+            .sort([("score", -1), ("review_count", -1)])
+            .limit(limit)
+        )
+        return [LeaderboardEntry(**doc) async for doc in cursor]
+
+    async def rebuild(self):
+        """Recompute every entry from the reviews, online.
+
+        Entries are merged in place and stale ones (products that fell below
+        ``leaderboard_min_reviews`` or were deleted) removed afterwards, so
+        reads keep working throughout.
+        """
+        stamp = ObjectId()
+        weight = settings.leaderboard_prior_weight
+        prior = settings.leaderboard_prior_rating
+        score = "$average_rating"
+        if settings.leaderboard_bayesian:
+            score = {
+                "$divide": [
+                    {
+                        "$add": [
+                            weight * prior,
+                            {"$multiply": ["$average_rating", "$review_count"]},
+                        ]
+                    },
+                    {"$add": [weight, "$review_count"]},
+                ]
+            }
+        pipeline = [
+            {"$match": {"rating": {"$ne": None}}},
+            {
+                "$group": {
+                    "_id": {"$toObjectId": "$product_id"},
+                    "average_rating": {"$avg": "$rating"},
+                    "review_count": {"$sum": 1},
+                }
+            },
+            {"$match": {"review_count": {"$gte": settings.leaderboard_min_reviews}}},
+            {
+                "$lookup": {
+                    "from": "products",
+                    "localField": "_id",
+                    "foreignField": "_id",
+                    "as": "product",
+                }
+            },
+            {"$unwind": "$product"},
+            {
+                "$project": {
+                    "_id": 0,
+                    "product_id": {"$toString": "$_id"},
+                    "name": "$product.name",
+                    "category": "$product.category",
+                    "average_rating": 1,
+                    "review_count": 1,
+                    "score": score,
+                    "updatedAt": "$$NOW",
+                    "rebuild": {"$literal": stamp},
+                }
+            },
+            {
+                "$merge": {
+                    "into": self.collection_name,
+                    "on": "product_id",
+                    "whenMatched": "merge",
+                    "whenNotMatched": "insert",
+                }
+            },
+        ]
+        await self.db["reviews"].aggregate(pipeline, allowDiskUse=True).to_list(
+            length=None
+        )
+        await self.db[self.collection_name].delete_many({"rebuild": {"$ne": stamp}})
+
+    async def update_product_rating(
+        self, product: dict, average_rating: float, review_count: int
+    ):
+        """Upsert or drop a product's leaderboard entry after a rating change.
+
+        Products below ``leaderboard_min_reviews`` are removed so a single
+        5-star review can't top the board.
+        """
+        product_id = str(product["_id"])
+        if review_count < settings.leaderboard_min_reviews:
+            await self.remove_product(product_id)
+            return
+
+        await self.db[self.collection_name].update_one(
+            {"product_id": product_id},
+            {
+                "$set": {
+                    "name": product.get("name"),
+                    "category": product.get("category"),
+                    "average_rating": average_rating,
+                    "review_count": review_count,
+                    "score": self.score(average_rating, review_count),
+                    "updatedAt": datetime.now(timezone.utc),
+                }
+            },
+            upsert=True,
+        )
+
+    async def update_product_details(self, product_id: str, product: dict):
+        """Propagate name/category changes to an existing entry."""
+        changes = {k: product[k] for k in ("name", "category") if k in product}
+        if changes:
+            await self.db[self.collection_name].update_one(
+                {"product_id": product_id}, {"$set": changes}
+            )
+
+    async def remove_product(self, product_id: str):
+        """Remove a product from the leaderboard."""
+        await self.db[self.collection_name].delete_one({"product_id": product_id})
+
+    @staticmethod
+    def score(average_rating: float, review_count: int) -> float:
+        """Ranking score: plain average or Bayesian average.
+
+        The Bayesian average pulls products with few reviews toward
+        ``leaderboard_prior_rating`` by ``leaderboard_prior_weight`` virtual
+        reviews.
+        """
+        if not settings.leaderboard_bayesian:
+            return average_rating
+        weight = settings.leaderboard_prior_weight
+        prior = settings.leaderboard_prior_rating
+        return (weight * prior + average_rating * review_count) / (
+            weight + review_count
+        )
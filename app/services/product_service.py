@@ -1,33 +1,155 @@
-from typing import List, Optional
+import base64
+from typing import Any, List, Optional, Tuple
 from datetime import datetime, timezone
-from bson import ObjectId
+from bson import ObjectId, json_util
+from pymongo import ReturnDocument
 
-from app.schemas.product import ProductBase, ProductRead
+from app.core.config import get_settings
+from app.core.deadline import track_cursor
+from app.core.fields import Fields, build, projection
+from app.schemas.product import (
+    ProductBase,
+    ProductPage,
+    ProductRead,
+    LeaderboardEntry,
+    RatingTrendPoint,
+    SimilarProduct,
+)
+from app.services.facet_service import FacetService
+from app.services.job_service import JobService
+from app.services.leaderboard_service import LeaderboardService
+from app.services.query_planner import QueryPlanner
+from app.services.rating_trend_service import RatingTrendService
+from app.services.similar_product_service import SimilarProductService
+
+settings = get_settings()
+
+# Compound indexes in Equality-Sort-Range order, one per supported filter shape;
+# each ends in _id so it also supplies the (field, _id) sort of listings.
+PRODUCT_INDEXES = [
+    [("category", 1), ("average_rating", -1), ("_id", -1)],
+    [("category", 1), ("price", 1), ("_id", 1)],
+    [("category", 1), ("createdAt", -1), ("_id", -1)],
+    [("price", 1), ("_id", 1)],
+    [("average_rating", -1), ("_id", -1)],
+    [("createdAt", -1), ("_id", -1)],
+]
+PRODUCT_SORT_FIELDS = {"price", "average_rating", "createdAt"}
 
 
 class ProductService:
     """Product service with MongoDB backend."""
 
     collection_name = "products"
+    planner = QueryPlanner(
+        collection_name, PRODUCT_INDEXES, strict=settings.product_filter_strict
+    )
 
     def __init__(self, db):
         """Initialize service with database instance."""
         self.db = db
+        self.facets = FacetService(db)
+        self.leaderboard = LeaderboardService(db)
+        self.jobs = JobService(db)
+        self.rating_trend = RatingTrendService(db)
+        self.similar = SimilarProductService(db)
+
+    async def ensure_indexes(self):
+        """Create the indexes the filter planner maps filter shapes onto."""
+        collection = self.db[self.collection_name]
+        existing = await collection.index_information()
+        for keys in PRODUCT_INDEXES:
+            await collection.create_index(keys)
+            # Earlier versions created these without the _id suffix.
+            legacy = "_".join(f"{field}_{order}" for field, order in keys[:-1])
+            if legacy in existing:
+                await collection.drop_index(legacy)
 
     async def list_products(
-        self, name: Optional[str] = None, category: Optional[str] = None
-    ) -> List[ProductRead]:
-        """Fetch all products from MongoDB with dynamic filters."""
+        self,
+        name: Optional[str] = None,
+        category: Optional[List[str]] = None,
+        price_min: Optional[int] = None,
+        price_max: Optional[int] = None,
+        in_stock: Optional[bool] = None,
+        min_rating: Optional[float] = None,
+        sort: Optional[str] = None,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        fields: Fields = None,
+    ) -> ProductPage:
+        """Fetch a page of products with server-side filters and sorting.
+
+        ``sort`` is a field name from ``PRODUCT_SORT_FIELDS``, prefixed with
+        ``-`` for descending order; without it products are listed by ``_id``.
+        Pages are keyset paginated on ``(sort field, _id)`` and hold at most
+        ``limit`` products (capped by ``product_max_page_size``). Raises
+        ValueError for an unsupported sort, an invalid cursor or, with
+        ``product_filter_strict``, a filter shape no index supports. With
+        ``fields`` only those fields are fetched and returned.
+        """
         query = {}
+        equality, ranges, residual = set(), set(), set()
         if name:
             query["name"] = {"$regex": name, "$options": "i"}
+            residual.add("name")
         if category:
-            query["category"] = {"$regex": category, "$options": "i"}
+            query["category"] = (
+                category[0] if len(category) == 1 else {"$in": category}
+            )
+            equality.add("category")
+        if price_min is not None or price_max is not None:
+            query["price"] = {}
+            if price_min is not None:
+                query["price"]["$gte"] = price_min
+            if price_max is not None:
+                query["price"]["$lte"] = price_max
+            ranges.add("price")
+        if in_stock is not None:
+            query["stock"] = {"$gt": 0} if in_stock else {"$not": {"$gt": 0}}
+            residual.add("stock")
+        if min_rating is not None:
+            query["average_rating"] = {"$gte": min_rating}
+            ranges.add("average_rating")
+
+        sort_field, direction = None, 1
+        if sort:
+            sort_field = sort.lstrip("-")
+            direction = -1 if sort.startswith("-") else 1
+            if sort_field not in PRODUCT_SORT_FIELDS:
+                raise ValueError(
+                    f"Unsupported sort field, use one of {sorted(PRODUCT_SORT_FIELDS)}"
+                )
+
+        index = self.planner.plan(equality, ranges, sort_field, residual)
+        limit = max(1, min(limit, settings.product_max_page_size))
+        if cursor:
+            value, oid = self._decode_cursor(cursor, sort)
+            keyset = self._keyset_filter(sort_field, direction, value, oid)
+            query = {"$and": [query, keyset]} if query else keyset
+
+        order = [("_id", direction)]
+        if sort_field:
+            order.insert(0, (sort_field, direction))
+        required = (sort_field,) if sort_field else ()
+        found = (
+            self.db[self.collection_name]
+            .find(query, projection(fields, required=required))
+            .sort(order)
+            .limit(limit + 1)
+        )
+        if index:
+            found = found.hint(index)
+        docs = await track_cursor(found).to_list(length=limit + 1)
 
-        products = []
-        async for doc in self.db[self.collection_name].find(query):
-            products.append(self._doc_to_product_read(doc))
-        return products
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            next_cursor = self._encode_cursor(docs[-1], sort)
+        return {
+            "items": [self._doc_to_product_read(doc, fields) for doc in docs],
+            "next_cursor": next_cursor,
+        }
 
     async def add_product(self, payload: ProductBase) -> ProductRead:
         """Insert new product into MongoDB and add timestamps."""
@@ -38,18 +160,48 @@ class ProductService:
         data["updatedAt"] = now
         result = await self.db[self.collection_name].insert_one(data)
         data["_id"] = result.inserted_id
+        await self.facets.apply_change(None, data)
         return self._doc_to_product_read(data)
 
-    async def get_product(self, product_id: str) -> Optional[ProductRead]:
-        """Fetch single product by ID from MongoDB."""
+    async def get_facets(self) -> dict:
+        """Fetch category, price bucket and rating band counts."""
+        return await self.facets.get_facets()
+
+    async def get_top_rated(
+        self, category: Optional[str] = None, limit: int = 10
+    ) -> List[LeaderboardEntry]:
+        """Fetch the top rated products of a category."""
+        return await self.leaderboard.get_top_rated(category, limit)
+
+    async def get_rating_trend(
+        self,
+        product_id: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> List[RatingTrendPoint]:
+        """Fetch the daily rating trend of a product."""
+        return await self.rating_trend.get_trend(product_id, start, end)
+
+    async def get_similar_products(
+        self, product_id: str, limit: int = 10
+    ) -> List[SimilarProduct]:
+        """Fetch precomputed similar products of a product."""
+        return await self.similar.get_similar(product_id, limit)
+
+    async def get_product(
+        self, product_id: str, fields: Fields = None
+    ) -> Optional[ProductRead]:
+        """Fetch single product by ID from MongoDB, optionally only ``fields``."""
         try:
             oid = ObjectId(product_id)
         except Exception:
             return None
 
-        doc = await self.db[self.collection_name].find_one({"_id": oid})
+        doc = await self.db[self.collection_name].find_one(
+            {"_id": oid}, projection(fields)
+        )
         if doc:
-            return self._doc_to_product_read(doc)
+            return self._doc_to_product_read(doc, fields)
         return None
 
     async def delete_product(self, product_id: str) -> bool:
@@ -59,8 +211,13 @@ class ProductService:
         except Exception:
             return False
 
-        result = await self.db[self.collection_name].delete_one({"_id": oid})
-        return result.deleted_count == 1
+        doc = await self.db[self.collection_name].find_one_and_delete({"_id": oid})
+        if not doc:
+            return False
+        await self.facets.apply_change(doc, None)
+        await self.leaderboard.remove_product(product_id)
+        await self.rating_trend.remove_product(product_id)
+        return True
 
     async def update_product(
         self, product_id: str, payload: ProductBase
@@ -80,16 +237,71 @@ class ProductService:
         # Add updatedAt timestamp
         update_data["updatedAt"] = datetime.now(timezone.utc)
 
-        result = await self.db[self.collection_name].find_one_and_update(
-            {"_id": oid}, {"$set": update_data}, return_document=True
+        before = await self.db[self.collection_name].find_one_and_update(
+            {"_id": oid}, {"$set": update_data}, return_document=ReturnDocument.BEFORE
         )
-        if result:
-            return self._doc_to_product_read(result)
-        return None
+        if not before:
+            return None
+
+        result = {**before, **update_data}
+        await self.facets.apply_change(before, result)
+        await self.leaderboard.update_product_details(product_id, update_data)
+        if "name" in update_data and update_data["name"] != before.get("name"):
+            # Reviews keep a copy of the product name; update them in the background.
+            await self.jobs.enqueue(
+                "propagate_product_name", product_id, {"product_id": product_id}
+            )
+        return self._doc_to_product_read(result)
+
+    @staticmethod
+    def _encode_cursor(doc: dict, sort: Optional[str]) -> str:
+        """Encode the sort key of the last product of a page as a cursor."""
+        sort_field = sort.lstrip("-") if sort else None
+        key = {
+            "sort": sort or "",
+            "value": doc.get(sort_field) if sort_field else None,
+            "id": doc["_id"],
+        }
+        return base64.urlsafe_b64encode(json_util.dumps(key).encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str, sort: Optional[str]) -> Tuple[Any, ObjectId]:
+        """Decode a cursor produced by ``_encode_cursor`` for the same sort."""
+        try:
+            key = json_util.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            if key["sort"] != (sort or ""):
+                raise ValueError("cursor belongs to another sort")
+            return key["value"], ObjectId(key["id"])
+        except Exception:
+            raise ValueError("Invalid cursor")
+
+    @staticmethod
+    def _keyset_filter(
+        sort_field: Optional[str], direction: int, value, oid: ObjectId
+    ) -> dict:
+        """Filter for products sorted after the given (sort field, _id) key.
+
+        Missing values sort first ascending and last descending.
+        """
+        after = "$gt" if direction == 1 else "$lt"
+        if not sort_field:
+            return {"_id": {after: oid}}
+        if value is None:
+            same = {sort_field: None, "_id": {after: oid}}
+            if direction == 1:
+                return {"$or": [same, {sort_field: {"$ne": None}}]}
+            return same
+        clauses = [
+            {sort_field: {after: value}},
+            {sort_field: value, "_id": {after: oid}},
+        ]
+        if direction == -1:
+            clauses.append({sort_field: None})
+        return {"$or": clauses}
 
     @staticmethod
-    def _doc_to_product_read(doc: dict) -> ProductRead:
-        """Convert MongoDB document to ProductRead schema."""
+    def _doc_to_product_read(doc: dict, fields: Fields = None) -> ProductRead:
+        """Convert MongoDB document to ProductRead (or its partial) schema."""
         # ensure id field exists and is a str
         doc["id"] = str(doc["_id"]) if "_id" in doc else doc.get("id")
-        return ProductRead(**doc)
+        return build(ProductRead, doc, fields)
@@ -0,0 +1,93 @@
+import logging
+from typing import Iterable, List, Optional, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+IndexKeys = List[Tuple[str, int]]
+
+
+class QueryPlanError(ValueError):
+    """The filter shape has no supporting index and would scan the collection."""
+
+    pass
+
+
+class QueryPlanner:
+    """Map supported filter shapes onto a fixed set of compound indexes.
+
+    Indexes are expected in Equality-Sort-Range order, ending in ``_id`` so
+    they also provide the ``_id`` tiebreak of sorted listings. For a shape
+    made of equality fields, range fields and an optional sort field, the
+    planner walks each index's key prefix and picks the one that matches the
+    most equality fields, then covers the sort, then bounds a range. A shape
+    no index can drive or sort is rejected (``strict``) or logged.
+    """
+
+    def __init__(
+        self, collection_name: str, indexes: Sequence[IndexKeys], strict: bool
+    ):
+        self.collection_name = collection_name
+        self.indexes = [list(index) for index in indexes]
+        self.strict = strict
+
+    def plan(
+        self,
+        equality: Iterable[str] = (),
+        ranges: Iterable[str] = (),
+        sort: Optional[str] = None,
+        residual: Iterable[str] = (),
+    ) -> Optional[IndexKeys]:
+        """Return the index to hint for a filter shape, or None.
+
+        A shape whose filters no index can drive, or whose sort no index
+        provides (forcing a blocking in-memory sort), is rejected when
+        ``strict`` and logged otherwise.
+        """
+        equality, ranges, residual = set(equality), set(ranges), set(residual)
+        best, best_score = None, (0, 0, 0)
+        for index in self.indexes:
+            score = self._score(index, equality, ranges, sort)
+            if score > best_score:
+                best, best_score = index, score
+
+        if best is None and (equality or ranges or residual or sort):
+            self._unsupported(
+                f"No index on {self.collection_name} supports filter "
+                f"{sorted(equality | ranges | residual)} sorted by {sort}"
+            )
+        elif best is not None and sort and not best_score[1]:
+            self._unsupported(
+                f"No index on {self.collection_name} provides sort {sort} "
+                f"for filter {sorted(equality | ranges | residual)}"
+            )
+        return best
+
+    def _unsupported(self, message: str):
+        if self.strict:
+            raise QueryPlanError(message)
+        logger.warning("%s; the query will scan or sort in memory", message)
+
+    @staticmethod
+    def _score(
+        index: IndexKeys, equality: Set[str], ranges: Set[str], sort: Optional[str]
+    ) -> Tuple[int, int, int]:
+        """(equality prefix length, sort covered, range bounded) for an index."""
+        fields = [field for field, _ in index]
+        position = 0
+        while position < len(fields) and fields[position] in equality:
+            position += 1
+        matched_equality = position
+
+        sort_covered = 0
+        if sort and position < len(fields) and fields[position] == sort:
+            sort_covered = 1
+            position += 1
+
+        range_bounded = 0
+        if position < len(fields) and fields[position] in ranges:
+            range_bounded = 1
+
+        if matched_equality == 0 and not sort_covered and not range_bounded:
+            # The index's leading field isn't constrained: it would be a full scan.
+            return (0, 0, 0)
+        return (matched_equality, sort_covered, range_bounded)
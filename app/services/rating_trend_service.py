@@ -0,0 +1,206 @@
+import logging
+from typing import List, Optional
+from datetime import datetime, time, timedelta, timezone
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.db import supports_snapshot_reads
+from app.schemas.product import RatingTrendPoint
+
+logger = logging.getLogger(__name__)
+
+
+class RatingTrendService:
+    """Per-product, per-day rating rollups for trend charts.
+
+    One bucket document per ``(product_id, day)`` holds the review count and
+    rating sum for reviews created that day. Review writes adjust buckets
+    with ``$inc``; a time range is a single read on the unique index.
+    """
+
+    collection_name = "product_rating_daily"
+
+    def __init__(self, db):
+        """Initialize service with database instance."""
+        self.db = db
+
+    async def ensure_indexes(self):
+        """Create the bucket key index."""
+        await self.db[self.collection_name].create_index(
+            [("product_id", 1), ("day", 1)], unique=True
+        )
+
+    async def get_trend(
+        self,
+        product_id: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> List[RatingTrendPoint]:
+        """Fetch daily review counts and average ratings for a date range."""
+        try:
+            product_oid = ObjectId(product_id)
+        except Exception:
+            raise ValueError("Invalid product_id format")
+
+        end = self.day_of(end or datetime.now(timezone.utc))
+        start = self.day_of(start or end - timedelta(days=365))
+        cursor = (
+            self.db[self.collection_name]
+            .find(
+                {"product_id": product_oid, "day": {"$gte": start, "$lte": end}},
+                {"_id": 0, "day": 1, "count": 1, "rating_sum": 1},
+            )
+            .sort("day", 1)
+        )
+        points = []
+        async for doc in cursor:
+            if doc["count"] <= 0:
+                continue
+            points.append(
+                RatingTrendPoint(
+                    day=doc["day"],
+                    count=doc["count"],
+                    average_rating=round(doc["rating_sum"] / doc["count"], 2),
+                )
+            )
+        return points
+
+    async def apply(
+        self,
+        product_id,
+        created_at: datetime,
+        count_delta: int,
+        rating_delta: int,
+    ):
+        """Adjust the bucket for the day a review was created."""
+        if not count_delta and not rating_delta:
+            return
+        await self.db[self.collection_name].update_one(
+            {"product_id": ObjectId(product_id), "day": self.day_of(created_at)},
+            {"$inc": {"count": count_delta, "rating_sum": rating_delta}},
+            upsert=True,
+        )
+
+    async def remove_product(self, product_id: str):
+        """Drop all buckets of a deleted product."""
+        await self.db[self.collection_name].delete_many(
+            {"product_id": ObjectId(product_id)}
+        )
+
+    async def rebuild(self, product_id: Optional[str] = None):
+        """Regenerate buckets from raw reviews (all products or one), online.
+
+        Reviews and buckets are read at one snapshot and every bucket gets an
+        ``$inc`` by the difference, so the ``$inc``s of review writes that
+        land during the rebuild are kept rather than overwritten, and buckets
+        those writes create are never deleted. Only a write caught between
+        its review update and its bucket ``$inc`` can still be off by one.
+
+        Snapshot reads need a replica set (or sharded cluster) and must
+        finish within the server's snapshot history window
+        (``minSnapshotHistoryWindowInSeconds``, 5 minutes by default); on a
+        standalone server the rebuild is only exact without concurrent
+        review writes.
+        """
+        match = {"rating": {"$ne": None}}
+        scope = {}
+        if product_id:
+            oid = ObjectId(product_id)
+            match["product_id"] = {"$in": [oid, product_id]}
+            scope["product_id"] = oid
+
+        pipeline = [
+            {"$match": match},
+            {
+                "$group": {
+                    "_id": {
+                        "product_id": {"$toObjectId": "$product_id"},
+                        "day": {
+                            "$dateTrunc": {"date": "$createdAt", "unit": "day"}
+                        },
+                    },
+                    "count": {"$sum": 1},
+                    "rating_sum": {"$sum": "$rating"},
+                }
+            },
+            {
+                "$project": {
+                    "_id": 0,
+                    "product_id": "$_id.product_id",
+                    "day": "$_id.day",
+                    "count": 1,
+                    "rating_sum": 1,
+                }
+            },
+            {"$sort": {"product_id": 1, "day": 1}},
+        ]
+        collection = self.db[self.collection_name]
+        snapshot = await supports_snapshot_reads(self.db)
+        if not snapshot:
+            logger.warning(
+                "Rebuilding rating rollups without a snapshot (standalone "
+                "server); review writes during the rebuild may be miscounted"
+            )
+
+        corrections = []
+        async with await self.db.client.start_session(snapshot=snapshot) as session:
+            expected = self.db["reviews"].aggregate(
+                pipeline, allowDiskUse=True, session=session
+            )
+            stored = collection.find(
+                scope,
+                {"_id": 0, "product_id": 1, "day": 1, "count": 1, "rating_sum": 1},
+                session=session,
+            ).sort([("product_id", 1), ("day", 1)])
+            async for key, count, rating_sum in _differences(expected, stored):
+                corrections.append(
+                    UpdateOne(
+                        {"product_id": key[0], "day": key[1]},
+                        {"$inc": {"count": count, "rating_sum": rating_sum}},
+                        upsert=True,
+                    )
+                )
+                if len(corrections) >= 1000:
+                    await collection.bulk_write(corrections, ordered=False)
+                    corrections = []
+        if corrections:
+            await collection.bulk_write(corrections, ordered=False)
+        # Buckets corrected to zero; a concurrent $inc upsert recreates one.
+        await collection.delete_many({**scope, "count": 0, "rating_sum": 0})
+
+    @staticmethod
+    def day_of(moment: datetime) -> datetime:
+        """Midnight UTC of the day containing ``moment`` (naive means UTC)."""
+        if moment.tzinfo is not None:
+            moment = moment.astimezone(timezone.utc)
+        return datetime.combine(moment.date(), time.min, tzinfo=timezone.utc)
+
+
+async def _differences(expected, stored):
+    """Merge-join two cursors sorted by ``(product_id, day)``.
+
+    Yields ``((product_id, day), count_delta, rating_sum_delta)`` for every
+    bucket whose stored totals differ from the expected ones.
+    """
+
+    async def next_doc(cursor):
+        try:
+            doc = await cursor.next()
+        except StopAsyncIteration:
+            return None
+        return (doc["product_id"], doc["day"]), doc["count"], doc["rating_sum"]
+
+    want, have = await next_doc(expected), await next_doc(stored)
+    while want or have:
+        if have is None or (want and want[0] < have[0]):
+            key, count, rating_sum = want
+            want = await next_doc(expected)
+        elif want is None or have[0] < want[0]:
+            key, count, rating_sum = have[0], -have[1], -have[2]
+            have = await next_doc(stored)
+        else:
+            key = want[0]
+            count, rating_sum = want[1] - have[1], want[2] - have[2]
+            want, have = await next_doc(expected), await next_doc(stored)
+        if count or rating_sum:
+            yield key, count, rating_sum
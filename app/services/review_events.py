@@ -0,0 +1,181 @@
+import asyncio
+import json
+import logging
+from typing import AsyncIterator, Dict, Optional, Set
+
+from app.core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+CHANGE_STREAM_HISTORY_LOST = 286
+
+
+class Subscriber:
+    """One SSE client: a bounded event queue plus a dropped flag."""
+
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = False
+
+
+class ReviewBroadcaster:
+    """Fan out review events to per-product subscriber sets.
+
+    ``publish`` never awaits: each subscriber has a bounded queue and a
+    subscriber whose queue is full is dropped instead of slowing everyone
+    else down.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Subscriber]] = {}
+        self.dropped_total = 0
+        self._watch_task: Optional[asyncio.Task] = None
+        self._resume_token: Optional[dict] = None
+
+    def subscribe(self, product_id: str) -> Subscriber:
+        subscriber = Subscriber(settings.review_events_queue_size)
+        self._subscribers.setdefault(product_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, product_id: str, subscriber: Subscriber):
+        subscribers = self._subscribers.get(product_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscriber)
+        if not subscribers:
+            del self._subscribers[product_id]
+
+    def publish(self, product_id: str, event: str, data: str):
+        """Queue an event for every subscriber of ``product_id``."""
+        subscribers = self._subscribers.get(product_id)
+        if not subscribers:
+            return
+        for subscriber in list(subscribers):
+            try:
+                subscriber.queue.put_nowait((event, data))
+            except asyncio.QueueFull:
+                subscriber.dropped = True
+                self.dropped_total += 1
+                self.unsubscribe(product_id, subscriber)
+                # Wake the stream so it notices it was dropped.
+                subscriber.queue.get_nowait()
+                subscriber.queue.put_nowait(None)
+
+    async def stream(self, product_id: str) -> AsyncIterator[str]:
+        """Yield Server-Sent Events for one product until the client leaves."""
+        subscriber = self.subscribe(product_id)
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    item = await asyncio.wait_for(
+                        subscriber.queue.get(),
+                        timeout=settings.review_events_heartbeat_seconds,
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if item is None:
+                    yield "event: dropped\ndata: {}\n\n"
+                    return
+                event, data = item
+                yield f"event: {event}\ndata: {data}\n\n"
+        finally:
+            self.unsubscribe(product_id, subscriber)
+
+    def stats(self) -> dict:
+        return {
+            "products": len(self._subscribers),
+            "subscribers": sum(len(s) for s in self._subscribers.values()),
+            "dropped_total": self.dropped_total,
+        }
+
+    def start_change_stream(self, db):
+        """Publish events from one shared change stream on ``reviews``.
+
+        Use this instead of the in-process hooks when several workers serve
+        the same database (requires a replica set). Delete events need
+        pre-images enabled on the collection to know their product. After
+        an error the stream is reopened from the last event it delivered,
+        and the watch task is restarted if it ever exits unexpectedly.
+        """
+        self._watch_task = asyncio.create_task(self._watch(db))
+        self._watch_task.add_done_callback(lambda task: self._restart_watch(db, task))
+
+    def _restart_watch(self, db, task: asyncio.Task):
+        if task is not self._watch_task or task.cancelled():
+            return
+        logger.error(
+            "Review change stream task exited, restarting",
+            exc_info=task.exception(),
+        )
+        self.start_change_stream(db)
+
+    async def stop(self):
+        if self._watch_task:
+            task, self._watch_task = self._watch_task, None
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _watch(self, db):
+        from pymongo.errors import OperationFailure
+
+        from app.services.review_service import ReviewService
+
+        delay = 1
+        while True:
+            try:
+                async with db[ReviewService.collection_name].watch(
+                    full_document="updateLookup",
+                    full_document_before_change="whenAvailable",
+                    resume_after=self._resume_token,
+                ) as changes:
+                    async for change in changes:
+                        self._publish_change(change)
+                        self._resume_token = changes.resume_token
+                        delay = 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("Review change stream failed, restarting")
+                if (
+                    isinstance(e, OperationFailure)
+                    and e.code == CHANGE_STREAM_HISTORY_LOST
+                ):
+                    # The token fell off the oplog; resume from now instead.
+                    self._resume_token = None
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+
+    def _publish_change(self, change: dict):
+        operation = change["operationType"]
+        if operation == "delete":
+            before = change.get("fullDocumentBeforeChange")
+            if before:
+                self.publish(
+                    str(before["product_id"]),
+                    "review_deleted",
+                    json.dumps({"id": str(change["documentKey"]["_id"])}),
+                )
+            return
+
+        doc = change.get("fullDocument")
+        if not doc or operation not in ("insert", "update", "replace"):
+            return
+        from app.services.review_service import ReviewService
+
+        review = ReviewService._doc_to_review_read(doc)
+        event = "review_created" if operation == "insert" else "review_updated"
+        self.publish(str(doc["product_id"]), event, review.model_dump_json())
+
+
+review_events = ReviewBroadcaster()
+
+
+def publish_from_hooks() -> bool:
+    """Whether ReviewService should publish events itself."""
+    return settings.review_events_source == "hooks"
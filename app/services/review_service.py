@@ -1,8 +1,38 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime, timezone
+import base64
+import json
 from bson import ObjectId
-
-from app.schemas.review import ReviewBase, ReviewRead, ReviewProductResp
+from pymongo import ReturnDocument
+
+from app.core.config import get_settings
+from app.core.deadline import track_cursor
+from app.core.fields import Fields, build, projection
+from app.schemas.review import ReviewBase, ReviewRead, ReviewProductResp, ReviewPage
+from app.services.batch_loader import BatchLoader
+from app.services.facet_service import FacetService
+from app.services.job_service import JobWorker
+from app.services.leaderboard_service import LeaderboardService
+from app.services.rating_trend_service import RatingTrendService
+from app.services.review_events import publish_from_hooks, review_events
+
+settings = get_settings()
+
+# Document keys behind response fields that are derived or refreshed on read.
+REVIEW_FIELD_SOURCES = {
+    "isEditable": ("reviewer_id",),
+    "reviewer_name": ("reviewer_name", "reviewer_id"),
+    "product_name": ("product_name", "product_id"),
+}
+# What review writes read back to maintain ratings, trends and embeds.
+REVIEW_STATE_PROJECTION = {"product_id": 1, "rating": 1, "createdAt": 1}
+RECENT_REVIEW_PROJECTION = {
+    "reviewer_id": 1,
+    "reviewer_name": 1,
+    "rating": 1,
+    "comment": 1,
+    "createdAt": 1,
+}
 
 
 class ReviewService:
@@ -10,35 +40,95 @@ class ReviewService:
 
     collection_name = "reviews"
     product_collection_name = "products"
+    user_collection_name = "users"
 
     def __init__(self, db):
         """Initialize service with database instance."""
         self.db = db
+        self.facets = FacetService(db)
+        self.leaderboard = LeaderboardService(db)
+        self.rating_trend = RatingTrendService(db)
+        # Services are created per request, so these caches are request-scoped.
+        self.reviewer_names = BatchLoader(db, self.user_collection_name, "name")
+        self.product_names = BatchLoader(db, self.product_collection_name, "name")
+
+    async def ensure_indexes(self):
+        """Create indexes used by review queries."""
+        collection = self.db[self.collection_name]
+        await collection.create_index([("createdAt", -1), ("_id", -1)])
+        await collection.create_index(
+            [("reviewer_id", 1), ("createdAt", -1), ("_id", -1)]
+        )
+        await collection.create_index(
+            [("product_id", 1), ("createdAt", -1), ("_id", -1)]
+        )
+        await collection.create_index([("product_id", 1), ("_id", 1)])
 
-    async def list_reviews(self, reviewer_id: str) -> List[ReviewRead]:
-        """Fetch all reviews from MongoDB."""
-        reviews = []
-        async for doc in self.db[self.collection_name].find():
-            tr_doc = doc.copy()
-            tr_doc["isEditable"] = doc["reviewer_id"] == reviewer_id
-            reviews.append(self._doc_to_review_read(tr_doc))
-        return reviews
+    async def list_reviews(
+        self,
+        reviewer_id: str,
+        product_id: Optional[str] = None,
+        filter_reviewer_id: Optional[str] = None,
+        min_rating: Optional[int] = None,
+        max_rating: Optional[int] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        fields: Fields = None,
+    ) -> ReviewPage:
+        """Fetch a page of reviews matching the given filters, newest first.
+
+        ``reviewer_id`` is the viewing user and only drives ``isEditable``;
+        ``filter_reviewer_id`` restricts results to one reviewer. ``fields``
+        limits the review fields fetched and returned.
+        """
+        query = {}
+        if product_id:
+            query["product_id"] = self._ref(product_id)
+        if filter_reviewer_id:
+            query["reviewer_id"] = self._ref(filter_reviewer_id)
+        if min_rating is not None or max_rating is not None:
+            query["rating"] = {}
+            if min_rating is not None:
+                query["rating"]["$gte"] = min_rating
+            if max_rating is not None:
+                query["rating"]["$lte"] = max_rating
+        if created_after or created_before:
+            query["createdAt"] = {}
+            if created_after:
+                query["createdAt"]["$gte"] = created_after
+            if created_before:
+                query["createdAt"]["$lt"] = created_before
+
+        reviews, next_cursor = await self._fetch_page(
+            query, reviewer_id, limit, cursor, fields
+        )
+        return {"items": reviews, "next_cursor": next_cursor}
 
     async def get_product_review(
-        self, product_id: str, reviewer_id: str
+        self, product_id: str, reviewer_id: str, fields: Fields = None
     ) -> ReviewProductResp:
-        """Fetch all review by product_id from MongoDB."""
-        reviews = []
-        async for doc in self.db[self.collection_name].find({"product_id": product_id}):
-            tr_doc = doc.copy()
-            tr_doc["isEditable"] = doc["reviewer_id"] == reviewer_id
-            reviews.append(self._doc_to_review_read(tr_doc))
-
+        """Fetch all review by product_id from MongoDB, optionally only ``fields``."""
         try:
             product_oid = ObjectId(product_id)
         except Exception:
             raise ValueError("Invalid product_id format")
 
+        docs = []
+        cursor = track_cursor(
+            self.db[self.collection_name].find(
+                {"product_id": self._ref(product_id)},
+                projection(fields, REVIEW_FIELD_SOURCES),
+            )
+        )
+        async for doc in cursor:
+            tr_doc = doc.copy()
+            tr_doc["isEditable"] = str(doc.get("reviewer_id")) == reviewer_id
+            docs.append(tr_doc)
+        await self._apply_current_names(docs, fields)
+        reviews = [self._doc_to_review_read(doc, fields) for doc in docs]
+
         product = await self.db[self.product_collection_name].find_one(
             {"_id": product_oid}, {"average_rating": 1, "_id": 0}
         )
@@ -61,7 +151,7 @@ class ReviewService:
             raise ValueError("Invalid product_id format")
 
         product_doc = await self.db[self.product_collection_name].find_one(
-            {"_id": product_oid}
+            {"_id": product_oid}, {"name": 1}
         )
         if not product_doc:
             raise ValueError("Product not found")
@@ -71,8 +161,8 @@ class ReviewService:
         # Create review data
         now = datetime.now(timezone.utc)
         data = review_data.model_dump()
-        data["product_id"] = product_id
-        data["reviewer_id"] = reviewer_id
+        data["product_id"] = product_oid
+        data["reviewer_id"] = ObjectId(reviewer_id)
         data["product_name"] = product_name
         data["reviewer_name"] = reviewer_name or "Anonymous"
         data["createdAt"] = now
@@ -82,10 +172,17 @@ class ReviewService:
         result = await self.db[self.collection_name].insert_one(data)
         data["_id"] = result.inserted_id
 
-        # Update product's average rating
-        await self._update_product_average_rating(product_id)
+        # Update product's average rating and reviewer's review count
+        await self.update_product_average_rating(product_id)
+        await self._inc_user_review_count(reviewer_id, 1)
+        await self._embed_review(product_oid, data)
+        if data.get("rating") is not None:
+            await self.rating_trend.apply(product_oid, now, 1, data["rating"])
 
-        return self._doc_to_review_read(data)
+        review = self._doc_to_review_read(data)
+        if publish_from_hooks():
+            review_events.publish(product_id, "review_created", review.model_dump_json())
+        return review
 
     async def update_review(
         self,
@@ -101,7 +198,8 @@ class ReviewService:
 
         # Find the review and verify ownership
         review_doc = await self.db[self.collection_name].find_one(
-            {"_id": review_oid, "reviewer_id": reviewer_id}
+            {"_id": review_oid, "reviewer_id": self._ref(reviewer_id)},
+            REVIEW_STATE_PROJECTION,
         )
 
         if not review_doc:
@@ -121,12 +219,18 @@ class ReviewService:
         # Get updated review
         updated_doc = await self.db[self.collection_name].find_one({"_id": review_oid})
 
-        # Update product's average rating
+        # Update product's average rating and embedded review summary
         product_id = review_doc.get("product_id")
+        product_id = str(product_id) if product_id else None
         if product_id:
-            await self._update_product_average_rating(product_id)
+            await self.update_product_average_rating(product_id)
+            await self._update_embedded_review(product_id, review_doc, updated_doc)
+            await self._update_rating_trend(product_id, review_doc, updated_doc)
 
-        return self._doc_to_review_read(updated_doc)
+        review = self._doc_to_review_read(updated_doc)
+        if product_id and publish_from_hooks():
+            review_events.publish(product_id, "review_updated", review.model_dump_json())
+        return review
 
     async def delete_review(
         self,
@@ -141,7 +245,8 @@ class ReviewService:
 
         # Find the review and verify ownership
         review_doc = await self.db[self.collection_name].find_one(
-            {"_id": review_oid, "reviewer_id": reviewer_id}
+            {"_id": review_oid, "reviewer_id": self._ref(reviewer_id)},
+            REVIEW_STATE_PROJECTION,
         )
 
         if not review_doc:
@@ -153,14 +258,22 @@ class ReviewService:
         if result.deleted_count == 0:
             return False
 
-        # Update product's average rating
+        # Update product's average rating and reviewer's review count
         product_id = review_doc.get("product_id")
+        product_id = str(product_id) if product_id else None
         if product_id:
-            await self._update_product_average_rating(product_id)
-
+            await self.update_product_average_rating(product_id)
+            await self._remove_embedded_review(product_id, review_doc)
+            await self._update_rating_trend(product_id, review_doc, None)
+        await self._inc_user_review_count(reviewer_id, -1)
+
+        if product_id and publish_from_hooks():
+            review_events.publish(
+                product_id, "review_deleted", json.dumps({"id": review_id})
+            )
         return True
 
-    async def _update_product_average_rating(self, product_id: str):
+    async def update_product_average_rating(self, product_id: str):
         """Update the average rating for a product based on all its reviews."""
         try:
             product_oid = ObjectId(product_id)
@@ -169,8 +282,19 @@ class ReviewService:
 
         # Calculate average rating from all reviews for this product
         pipeline = [
-            {"$match": {"product_id": product_id, "rating": {"$ne": None}}},
-            {"$group": {"_id": None, "average_rating": {"$avg": "$rating"}}},
+            {
+                "$match": {
+                    "product_id": self._ref(product_id),
+                    "rating": {"$ne": None},
+                }
+            },
+            {
+                "$group": {
+                    "_id": None,
+                    "average_rating": {"$avg": "$rating"},
+                    "review_count": {"$sum": 1},
+                }
+            },
         ]
 
         result = (
@@ -178,14 +302,18 @@ class ReviewService:
         )
 
         average_rating = 0
+        raw_average = 0
+        review_count = 0
         if result:
             avg = result[0].get("average_rating")
+            review_count = result[0].get("review_count", 0)
             if avg is not None:
+                raw_average = avg
                 # Round to nearest integer
                 average_rating = round(avg, 1)
 
         # Update product with new average rating
-        await self.db[self.product_collection_name].update_one(
+        before = await self.db[self.product_collection_name].find_one_and_update(
             {"_id": product_oid},
             {
                 "$set": {
@@ -193,20 +321,361 @@ class ReviewService:
                     "updatedAt": datetime.now(timezone.utc),
                 }
             },
+            projection={"name": 1, "category": 1, "price": 1, "average_rating": 1},
+            return_document=ReturnDocument.BEFORE,
+        )
+
+        # Keep the rating band facet in sync
+        if before:
+            await self.facets.apply_change(
+                before, {**before, "average_rating": average_rating}
+            )
+            await self.leaderboard.update_product_rating(
+                before, raw_average, review_count
+            )
+
+    async def get_user_reviews(
+        self,
+        reviewer_id: str,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        fields: Fields = None,
+    ) -> ReviewPage:
+        """Fetch a page of reviews by a specific user, newest first.
+
+        Uses keyset pagination on the ``{reviewer_id, createdAt, _id}`` index,
+        so every page costs the same regardless of how deep it is.
+        """
+        reviews, next_cursor = await self._fetch_page(
+            {"reviewer_id": self._ref(reviewer_id)}, reviewer_id, limit, cursor, fields
+        )
+        total = await self._get_user_review_count(reviewer_id)
+        return {"items": reviews, "total": total, "next_cursor": next_cursor}
+
+    async def _fetch_page(
+        self,
+        query: dict,
+        viewer_id: str,
+        limit: int,
+        cursor: Optional[str],
+        fields: Fields = None,
+    ) -> Tuple[List[ReviewRead], Optional[str]]:
+        """Run a keyset-paginated review query, newest first.
+
+        Fetches at most ``limit + 1`` documents (capped by
+        ``review_max_page_size``) and computes ``isEditable`` in the pipeline,
+        so memory per request is bounded by the page size.
+        """
+        limit = max(1, min(limit, settings.review_max_page_size))
+        match = dict(query)
+        if cursor:
+            created_at, oid = self._decode_cursor(cursor)
+            if "createdAt" in match:
+                # Combine the date range with the keyset position.
+                match = {"$and": [match, self._keyset_filter(created_at, oid)]}
+            else:
+                match.update(self._keyset_filter(created_at, oid))
+
+        pipeline = [
+            {"$match": match},
+            {"$sort": {"createdAt": -1, "_id": -1}},
+            {"$limit": limit + 1},
+        ]
+        if fields is not None:
+            # createdAt is always needed to build the next cursor.
+            pipeline.append(
+                {
+                    "$project": projection(
+                        fields, REVIEW_FIELD_SOURCES, required=("createdAt",)
+                    )
+                }
+            )
+        pipeline.append(
+            {
+                "$addFields": {
+                    "isEditable": {"$eq": [{"$toString": "$reviewer_id"}, viewer_id]}
+                }
+            }
+        )
+        cursor = track_cursor(self.db[self.collection_name].aggregate(pipeline))
+        docs = await cursor.to_list(length=limit + 1)
+
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            next_cursor = self._encode_cursor(docs[-1])
+
+        await self._apply_current_names(docs, fields)
+        return [self._doc_to_review_read(doc, fields) for doc in docs], next_cursor
+
+    async def _apply_current_names(self, docs: List[dict], fields: Fields = None):
+        """Replace denormalized reviewer/product names with current ones.
+
+        Names are batch-loaded with one ``$in`` query per collection; the
+        stored copy is kept when the user or product no longer exists. Names
+        left out of ``fields`` are not loaded.
+        """
+        if not docs:
+            return
+        reviewer_names, product_names = {}, {}
+        if fields is None or "reviewer_name" in fields:
+            reviewer_names = await self.reviewer_names.load_many(
+                str(doc.get("reviewer_id")) for doc in docs
+            )
+        if fields is None or "product_name" in fields:
+            product_names = await self.product_names.load_many(
+                str(doc.get("product_id")) for doc in docs
+            )
+        for doc in docs:
+            reviewer_name = reviewer_names.get(str(doc.get("reviewer_id")))
+            if reviewer_name:
+                doc["reviewer_name"] = reviewer_name
+            product_name = product_names.get(str(doc.get("product_id")))
+            if product_name:
+                doc["product_name"] = product_name
+
+    async def _update_rating_trend(
+        self, product_id: str, before: dict, after: Optional[dict]
+    ):
+        """Move a review's contribution in its creation-day rating bucket."""
+        old_rating = before.get("rating")
+        new_rating = after.get("rating") if after else None
+        count_delta = (new_rating is not None) - (old_rating is not None)
+        rating_delta = (new_rating or 0) - (old_rating or 0)
+        if before.get("createdAt"):
+            await self.rating_trend.apply(
+                product_id, before["createdAt"], count_delta, rating_delta
+            )
+
+    async def _embed_review(self, product_oid: ObjectId, doc: dict):
+        """Push a review onto the product's capped recent list and histogram."""
+        update = {
+            "$push": {
+                "recent_reviews": {
+                    "$each": [self._recent_review_summary(doc)],
+                    "$sort": {"createdAt": -1},
+                    "$slice": settings.product_recent_reviews,
+                }
+            }
+        }
+        if doc.get("rating") is not None:
+            update["$inc"] = {f"rating_histogram.{doc['rating']}": 1}
+        await self.db[self.product_collection_name].update_one(
+            {"_id": product_oid}, update
+        )
+
+    async def _update_embedded_review(
+        self, product_id: str, before: dict, after: dict
+    ):
+        """Refresh an embedded review and move its histogram count if rerated."""
+        try:
+            product_oid = ObjectId(product_id)
+        except Exception:
+            return
+
+        await self.db[self.product_collection_name].update_one(
+            {"_id": product_oid, "recent_reviews.id": str(after["_id"])},
+            {"$set": {"recent_reviews.$": self._recent_review_summary(after)}},
         )
+        old_rating, new_rating = before.get("rating"), after.get("rating")
+        if old_rating != new_rating:
+            inc = {}
+            if old_rating is not None:
+                inc[f"rating_histogram.{old_rating}"] = -1
+            if new_rating is not None:
+                inc[f"rating_histogram.{new_rating}"] = 1
+            await self.db[self.product_collection_name].update_one(
+                {"_id": product_oid}, {"$inc": inc}
+            )
+
+    async def _remove_embedded_review(self, product_id: str, doc: dict):
+        """Drop a deleted review from the product and refill the recent list."""
+        try:
+            product_oid = ObjectId(product_id)
+        except Exception:
+            return
 
-    # async def get_user_reviews(self, reviewer_id: str) -> List[ReviewRead]:
-    #     """Fetch all reviews by a specific user."""
-    #     reviews = []
-    #     async for doc in self.db[self.collection_name].find(
-    #         {"reviewer_id": reviewer_id}
-    #     ):
-    #         reviews.append(self._doc_to_review_read(doc))
-    #     return reviews
+        update = {"$pull": {"recent_reviews": {"id": str(doc["_id"])}}}
+        if doc.get("rating") is not None:
+            update["$inc"] = {f"rating_histogram.{doc['rating']}": -1}
+        result = await self.db[self.product_collection_name].update_one(
+            {"_id": product_oid}, update
+        )
+        if result.modified_count:
+            # The list may now be one short; rebuild it from the newest reviews.
+            latest = (
+                await self.db[self.collection_name]
+                .find(
+                    {"product_id": self._ref(product_id)}, RECENT_REVIEW_PROJECTION
+                )
+                .sort([("createdAt", -1), ("_id", -1)])
+                .limit(settings.product_recent_reviews)
+                .to_list(length=settings.product_recent_reviews)
+            )
+            await self.db[self.product_collection_name].update_one(
+                {"_id": product_oid},
+                {
+                    "$set": {
+                        "recent_reviews": [
+                            self._recent_review_summary(d) for d in latest
+                        ]
+                    }
+                },
+            )
 
     @staticmethod
-    def _doc_to_review_read(doc: dict) -> ReviewRead:
-        """Convert MongoDB document to ReviewRead schema."""
+    def _recent_review_summary(doc: dict) -> dict:
+        """The subset of a review embedded on its product."""
+        return {
+            "id": str(doc["_id"]),
+            "reviewer_id": str(doc["reviewer_id"]) if doc.get("reviewer_id") else None,
+            "reviewer_name": doc.get("reviewer_name"),
+            "rating": doc.get("rating"),
+            "comment": doc.get("comment"),
+            "createdAt": doc.get("createdAt"),
+        }
+
+    async def propagate_product_name_batch(
+        self, product_id: str, name: str, after_id: Optional[ObjectId], batch_size: int
+    ) -> Tuple[int, Optional[ObjectId]]:
+        """Copy a product's current name into one batch of its reviews.
+
+        Returns the number of reviews updated and the last ``_id`` scanned,
+        or ``None`` once there are no more reviews for the product.
+        """
+        query = {"product_id": self._ref(product_id)}
+        if after_id is not None:
+            query["_id"] = {"$gt": after_id}
+        docs = (
+            await self.db[self.collection_name]
+            .find(query, {"_id": 1})
+            .sort("_id", 1)
+            .limit(batch_size)
+            .to_list(length=batch_size)
+        )
+        if not docs:
+            return 0, None
+
+        ids = [doc["_id"] for doc in docs]
+        result = await self.db[self.collection_name].update_many(
+            {"_id": {"$in": ids}, "product_name": {"$ne": name}},
+            {"$set": {"product_name": name}},
+        )
+        return result.modified_count, ids[-1]
+
+    async def _get_user_review_count(self, reviewer_id: str) -> int:
+        """Return the reviewer's cached review count, computing it once if missing."""
+        try:
+            user_oid = ObjectId(reviewer_id)
+        except Exception:
+            return 0
+
+        user = await self.db[self.user_collection_name].find_one(
+            {"_id": user_oid}, {"review_count": 1}
+        )
+        if user and user.get("review_count") is not None:
+            return user["review_count"]
+
+        count = await self.db[self.collection_name].count_documents(
+            {"reviewer_id": self._ref(reviewer_id)}
+        )
+        await self.db[self.user_collection_name].update_one(
+            {"_id": user_oid, "review_count": {"$exists": False}},
+            {"$set": {"review_count": count}},
+        )
+        return count
+
+    async def _inc_user_review_count(self, reviewer_id: str, delta: int):
+        """Adjust the reviewer's cached review count if it has been computed."""
+        try:
+            user_oid = ObjectId(reviewer_id)
+        except Exception:
+            return
+
+        await self.db[self.user_collection_name].update_one(
+            {"_id": user_oid, "review_count": {"$exists": True}},
+            {"$inc": {"review_count": delta}},
+        )
+
+    @staticmethod
+    def _encode_cursor(doc: dict) -> str:
+        """Encode the sort key of the last document of a page as a cursor."""
+        raw = f"{doc['createdAt'].isoformat()}|{doc['_id']}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+        """Decode a cursor produced by ``_encode_cursor``."""
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+            created_at, oid = raw.split("|", 1)
+            return datetime.fromisoformat(created_at), ObjectId(oid)
+        except Exception:
+            raise ValueError("Invalid cursor")
+
+    @staticmethod
+    def _keyset_filter(created_at: datetime, oid: ObjectId) -> dict:
+        """Filter for documents sorted after the given (createdAt, _id) key."""
+        return {
+            "$or": [
+                {"createdAt": {"$lt": created_at}},
+                {"createdAt": created_at, "_id": {"$lt": oid}},
+            ]
+        }
+
+    @staticmethod
+    def _ref(value: str):
+        """Query value for a ``product_id``/``reviewer_id`` reference.
+
+        References are stored as ObjectIds. While ``review_refs_dual_read`` is
+        on (i.e. until ``scripts.migrate_review_refs`` has run), legacy string
+        references are matched too.
+        """
+        try:
+            oid = ObjectId(value)
+        except Exception:
+            raise ValueError("Invalid id format")
+        if settings.review_refs_dual_read:
+            return {"$in": [oid, value]}
+        return oid
+
+    @staticmethod
+    def _doc_to_review_read(doc: dict, fields: Fields = None) -> ReviewRead:
+        """Convert MongoDB document to ReviewRead (or its partial) schema."""
         # ensure id field exists and is a str
         doc["id"] = str(doc["_id"]) if "_id" in doc else doc.get("id")
-        return ReviewRead(**doc)
+        if doc.get("product_id") is not None:
+            doc["product_id"] = str(doc["product_id"])
+        return build(ReviewRead, doc, fields)
+
+
+@JobWorker.register("propagate_product_name")
+async def propagate_product_name(worker: JobWorker, job: dict):
+    """Background job copying a renamed product's name into its reviews."""
+    product_id = job["payload"]["product_id"]
+    try:
+        product_oid = ObjectId(product_id)
+    except Exception:
+        return
+
+    product = await worker.db[ReviewService.product_collection_name].find_one(
+        {"_id": product_oid}, {"name": 1}
+    )
+    if not product:
+        return
+
+    service = ReviewService(worker.db)
+    progress = dict(job.get("progress") or {})
+    while not worker.stopping:
+        updated, last_id = await service.propagate_product_name_batch(
+            product_id,
+            product["name"],
+            progress.get("last_id"),
+            settings.job_batch_size,
+        )
+        if last_id is None:
+            return
+        progress["last_id"] = last_id
+        progress["updated"] = progress.get("updated", 0) + updated
+        await worker.jobs.save_progress(job, progress)
+        await worker.throttle()
@@ -0,0 +1,73 @@
+from typing import List
+from datetime import datetime, timezone
+from bson import ObjectId
+from pymongo import ReplaceOne
+
+from app.schemas.product import SimilarProduct
+from app.services.batch_loader import BatchLoader
+
+
+class SimilarProductService:
+    """Precomputed "customers who reviewed this also reviewed" lists.
+
+    Results are written by ``scripts.compute_similar_products`` as one document
+    per product keyed by ``_id``, so serving is a single primary-key read.
+    """
+
+    collection_name = "similar_products"
+    product_collection_name = "products"
+
+    def __init__(self, db):
+        """Initialize service with database instance."""
+        self.db = db
+
+    async def get_similar(self, product_id: str, limit: int = 10) -> List[SimilarProduct]:
+        """Fetch the precomputed similar products of a product."""
+        try:
+            product_oid = ObjectId(product_id)
+        except Exception:
+            raise ValueError("Invalid product_id format")
+
+        doc = await self.db[self.collection_name].find_one(
+            {"_id": product_oid}, {"similar": {"$slice": limit}}
+        )
+        if not doc:
+            return []
+
+        similar = doc.get("similar", [])
+        names = await BatchLoader(
+            self.db, self.product_collection_name, "name"
+        ).load_many(s["product_id"] for s in similar)
+        return [
+            SimilarProduct(name=names.get(s["product_id"]), **s)
+            for s in similar
+            # Skip products deleted since the last batch run.
+            if names.get(s["product_id"]) is not None
+        ]
+
+    async def save_batch(self, results: dict):
+        """Replace the similar lists of a batch of products.
+
+        ``results`` maps product ObjectId to a list of
+        ``{product_id, score, co_reviewers}`` dicts.
+        """
+        if not results:
+            return
+        now = datetime.now(timezone.utc)
+        await self.db[self.collection_name].bulk_write(
+            [
+                ReplaceOne(
+                    {"_id": oid},
+                    {"_id": oid, "similar": similar, "computedAt": now},
+                    upsert=True,
+                )
+                for oid, similar in results.items()
+            ],
+            ordered=False,
+        )
+
+    async def delete_stale(self, computed_before: datetime):
+        """Drop lists that were not refreshed by the latest run."""
+        await self.db[self.collection_name].delete_many(
+            {"computedAt": {"$lt": computed_before}}
+        )
@@ -2,9 +2,14 @@ from typing import List, Optional
 from datetime import datetime, timezone
 from bson import ObjectId
 
+from app.core.fields import Fields, build, projection
 from app.schemas.user import UserCreate, UserRead, UserUpdate, UserInDB
 from app.services.auth_service import AuthService
 
+# Never read password hashes or counters back unless they are needed.
+USER_READ_PROJECTION = {"email": 1, "name": 1, "createdAt": 1, "updatedAt": 1}
+USER_AUTH_PROJECTION = {"email": 1, "name": 1, "hashed_password": 1}
+
 
 class UserService:
     """User service with MongoDB backend."""
@@ -15,11 +20,13 @@ class UserService:
         """Initialize service with database instance."""
         self.db = db
 
-    async def list_users(self) -> List[UserRead]:
-        """Fetch all users from MongoDB."""
+    async def list_users(self, fields: Fields = None) -> List[UserRead]:
+        """Fetch all users from MongoDB, optionally only ``fields``."""
         users = []
-        async for doc in self.db[self.collection_name].find():
-            users.append(self._doc_to_user_read(doc))
+        async for doc in self.db[self.collection_name].find(
+            {}, projection(fields) or USER_READ_PROJECTION
+        ):
+            users.append(self._doc_to_user_read(doc, fields))
         return users
 
     async def create_user(self, payload: UserCreate) -> UserRead:
@@ -36,21 +43,25 @@ class UserService:
         data["_id"] = result.inserted_id
         return self._doc_to_user_read(data)
 
-    async def get_user(self, user_id: str) -> Optional[UserRead]:
-        """Fetch single user by ID from MongoDB."""
+    async def get_user(self, user_id: str, fields: Fields = None) -> Optional[UserRead]:
+        """Fetch single user by ID from MongoDB, optionally only ``fields``."""
         try:
             oid = ObjectId(user_id)
         except Exception:
             return None
 
-        doc = await self.db[self.collection_name].find_one({"_id": oid})
+        doc = await self.db[self.collection_name].find_one(
+            {"_id": oid}, projection(fields) or USER_READ_PROJECTION
+        )
         if doc:
-            return self._doc_to_user_read(doc)
+            return self._doc_to_user_read(doc, fields)
         return None
 
     async def get_user_by_email(self, email: str) -> Optional[UserInDB]:
         """Fetch user by email for authentication."""
-        doc = await self.db[self.collection_name].find_one({"email": email})
+        doc = await self.db[self.collection_name].find_one(
+            {"email": email}, USER_AUTH_PROJECTION
+        )
         if doc:
             return UserInDB(**doc)
         return None
@@ -93,15 +104,18 @@ class UserService:
         update_data["updatedAt"] = datetime.now(timezone.utc)
 
         result = await self.db[self.collection_name].find_one_and_update(
-            {"_id": oid}, {"$set": update_data}, return_document=True
+            {"_id": oid},
+            {"$set": update_data},
+            projection=USER_READ_PROJECTION,
+            return_document=True,
         )
         if result:
             return self._doc_to_user_read(result)
         return None
 
     @staticmethod
-    def _doc_to_user_read(doc: dict) -> UserRead:
-        """Convert MongoDB document to UserRead schema."""
+    def _doc_to_user_read(doc: dict, fields: Fields = None) -> UserRead:
+        """Convert MongoDB document to UserRead schema (or a partial one)."""
         # ensure id field exists and is a str
         doc["id"] = str(doc["_id"]) if "_id" in doc else doc.get("id")
-        return UserRead(**doc)
+        return build(UserRead, doc, fields)
@@ -0,0 +1,98 @@
+"""Backfill embedded recent reviews and rating histograms on products.
+
+Recomputes ``recent_reviews`` (newest N reviews) and ``rating_histogram`` for
+every product in one server-side aggregation over ``reviews``:
+    python -m scripts.backfill_product_reviews
+"""
+
+import asyncio
+from typing import List, Optional
+
+from bson import ObjectId
+
+
+def backfill_pipeline(recent: int, product_ids: Optional[List[str]] = None) -> list:
+    """Aggregation over ``reviews`` merging embeds into ``products``.
+
+    ``product_ids`` limits it to those products (ObjectId or legacy string
+    references are both matched).
+    """
+    histogram = {
+        str(r): {"$sum": {"$cond": [{"$eq": ["$rating", r]}, 1, 0]}}
+        for r in range(1, 6)
+    }
+    match = []
+    if product_ids is not None:
+        refs = [ObjectId(p) for p in product_ids] + list(product_ids)
+        match = [{"$match": {"product_id": {"$in": refs}}}]
+    return match + [
+        {
+            "$group": {
+                "_id": {"$toObjectId": "$product_id"},
+                "recent_reviews": {
+                    "$topN": {
+                        "n": recent,
+                        "sortBy": {"createdAt": -1, "_id": -1},
+                        "output": {
+                            "id": {"$toString": "$_id"},
+                            "reviewer_id": {"$toString": "$reviewer_id"},
+                            "reviewer_name": "$reviewer_name",
+                            "rating": "$rating",
+                            "comment": "$comment",
+                            "createdAt": "$createdAt",
+                        },
+                    }
+                },
+                **{f"r{r}": expr for r, expr in histogram.items()},
+            }
+        },
+        {
+            "$project": {
+                "recent_reviews": 1,
+                "rating_histogram": {r: f"$r{r}" for r in histogram},
+            }
+        },
+        {
+            "$merge": {
+                "into": "products",
+                "on": "_id",
+                "whenMatched": "merge",
+                "whenNotMatched": "discard",
+            }
+        },
+    ]
+
+
+async def backfill_products(db, recent: int, product_ids: Optional[List[str]] = None):
+    """Refresh embeds for every product, or only ``product_ids`` (in chunks)."""
+    if product_ids is None:
+        chunks = [None]
+        # Products without reviews keep empty defaults.
+        await db["products"].update_many(
+            {"recent_reviews": {"$exists": False}},
+            {"$set": {"recent_reviews": [], "rating_histogram": {}}},
+        )
+    else:
+        chunks = [product_ids[i : i + 10000] for i in range(0, len(product_ids), 10000)]
+    for chunk in chunks:
+        await db["reviews"].aggregate(
+            backfill_pipeline(recent, chunk), allowDiskUse=True
+        ).to_list(length=None)
+
+
+async def backfill():
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    from app.core.config import get_settings
+
+    settings = get_settings()
+    client = AsyncIOMotorClient(settings.mongodb_uri)
+    await backfill_products(
+        client[settings.database_name], settings.product_recent_reviews
+    )
+    client.close()
+    print("Backfilled recent reviews and rating histograms")
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill())
@@ -0,0 +1,148 @@
+"""Offline batch job computing "also reviewed" similar products.
+
+Streams ``reviews`` in chunks into a sparse product x reviewer matrix, then
+computes cosine similarity of products over their reviewer sets block by block
+with NumPy/SciPy and stores the top-k per product in ``similar_products``:
+    python -m scripts.compute_similar_products --top-k 20 --min-co-reviewers 2
+
+Memory is bounded by the id arrays (8 bytes per review) plus one
+``--block-size`` x products sparse block at a time.
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timezone
+
+REQUIRES = "numpy and scipy are required: pip install numpy scipy"
+
+
+async def load_matrix(reviews, chunk_size: int):
+    """Stream (product, reviewer) pairs into a binary CSR matrix."""
+    import numpy as np
+    from scipy import sparse
+
+    product_index, reviewer_index = {}, {}
+    product_ids, rows_chunks, cols_chunks = [], [], []
+    rows = np.empty(chunk_size, dtype=np.int32)
+    cols = np.empty(chunk_size, dtype=np.int32)
+    filled = 0
+
+    cursor = reviews.find({}, {"_id": 0, "product_id": 1, "reviewer_id": 1})
+    async for doc in cursor.batch_size(chunk_size):
+        product = str(doc.get("product_id"))
+        reviewer = str(doc.get("reviewer_id"))
+        p = product_index.get(product)
+        if p is None:
+            p = product_index[product] = len(product_ids)
+            product_ids.append(product)
+        r = reviewer_index.setdefault(reviewer, len(reviewer_index))
+        rows[filled], cols[filled] = p, r
+        filled += 1
+        if filled == chunk_size:
+            rows_chunks.append(rows.copy())
+            cols_chunks.append(cols.copy())
+            filled = 0
+    rows_chunks.append(rows[:filled].copy())
+    cols_chunks.append(cols[:filled].copy())
+
+    rows_all = np.concatenate(rows_chunks)
+    cols_all = np.concatenate(cols_chunks)
+    del rows_chunks, cols_chunks
+    matrix = sparse.csr_matrix(
+        (np.ones(len(rows_all), dtype=np.float32), (rows_all, cols_all)),
+        shape=(len(product_ids), len(reviewer_index)),
+    )
+    # Several reviews by the same reviewer count once.
+    matrix.data[:] = 1.0
+    return matrix, product_ids
+
+
+def top_k_block(block, norms_block, norms, start: int, top_k: int, min_co: int):
+    """Top-k cosine neighbours for each row of a co-occurrence block."""
+    import numpy as np
+
+    results = []
+    for i in range(block.shape[0]):
+        lo, hi = block.indptr[i], block.indptr[i + 1]
+        cols = block.indices[lo:hi]
+        co = block.data[lo:hi]
+        keep = (cols != start + i) & (co >= min_co)
+        cols, co = cols[keep], co[keep]
+        if len(cols) == 0:
+            results.append([])
+            continue
+        scores = co / (norms_block[i] * norms[cols])
+        if len(scores) > top_k:
+            best = np.argpartition(-scores, top_k)[:top_k]
+            cols, co, scores = cols[best], co[best], scores[best]
+        order = np.argsort(-scores)
+        results.append(list(zip(cols[order], co[order], scores[order])))
+    return results
+
+
+async def compute(args):
+    try:
+        import numpy as np
+    except ImportError:
+        raise SystemExit(REQUIRES)
+    from bson import ObjectId
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    from app.core.config import get_settings
+    from app.services.similar_product_service import SimilarProductService
+
+    settings = get_settings()
+    client = AsyncIOMotorClient(settings.mongodb_uri)
+    db = client[settings.database_name]
+    service = SimilarProductService(db)
+    run_started = datetime.now(timezone.utc)
+
+    started = time.monotonic()
+    matrix, product_ids = await load_matrix(db["reviews"], args.chunk_size)
+    print(
+        f"loaded {matrix.nnz} product/reviewer pairs, {matrix.shape[0]} products, "
+        f"{matrix.shape[1]} reviewers in {time.monotonic() - started:.1f}s"
+    )
+
+    norms = np.sqrt(np.asarray(matrix.sum(axis=1)).ravel())
+    transposed = matrix.T.tocsr()
+    for start in range(0, matrix.shape[0], args.block_size):
+        stop = min(start + args.block_size, matrix.shape[0])
+        # Co-reviewer counts between this block of products and all products.
+        block = (matrix[start:stop] @ transposed).tocsr()
+        neighbours = top_k_block(
+            block, norms[start:stop], norms, start, args.top_k, args.min_co_reviewers
+        )
+        results = {}
+        for offset, items in enumerate(neighbours):
+            product = product_ids[start + offset]
+            if not ObjectId.is_valid(product):
+                continue
+            results[ObjectId(product)] = [
+                {
+                    "product_id": product_ids[j],
+                    "score": round(float(score), 4),
+                    "co_reviewers": int(co),
+                }
+                for j, co, score in items
+            ]
+        await service.save_batch(results)
+        print(f"products {start}-{stop} done")
+
+    await service.delete_stale(run_started)
+    client.close()
+    print(f"finished in {time.monotonic() - started:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--min-co-reviewers", type=int, default=2)
+    parser.add_argument("--chunk-size", type=int, default=100000)
+    parser.add_argument("--block-size", type=int, default=1000)
+    asyncio.run(compute(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
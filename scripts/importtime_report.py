@@ -0,0 +1,124 @@
+"""Startup import-time report for ``app.main``.
+
+Runs ``python -X importtime -c "import app.main"`` in a fresh interpreter and
+prints the total import time, the slowest top-level packages and whether the
+heavy auth dependencies were loaded eagerly.
+
+Import times vary by tens of milliseconds between runs, so each side is
+measured ``--runs`` times and the median run is reported.
+
+Usage:
+    python -m scripts.importtime_report [--top 15] [--module app.main] [--runs 5]
+    python -m scripts.importtime_report --compare <git-ref>
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+# cryptography is also pulled in by pymongo's TLS support, so it stays loaded.
+HEAVY_MODULES = ("passlib", "bcrypt", "jose", "cryptography")
+
+
+def measure(module: str, cwd: str = ".") -> List[Tuple[str, int, int]]:
+    """Return ``(module, self_us, cumulative_us)`` for every imported module."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"Importing {module} failed:\n{proc.stderr}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.rstrip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def summarize(rows: List[Tuple[str, int, int]]) -> Dict:
+    """Aggregate per top-level package and find the total for the root import."""
+    packages: Dict[str, int] = {}
+    for name, self_us, _ in rows:
+        top = name.strip().split(".")[0]
+        packages[top] = packages.get(top, 0) + self_us
+    loaded = {name.strip() for name, _, _ in rows}
+    return {
+        "total_us": sum(self_us for _, self_us, _ in rows),
+        "packages": packages,
+        "heavy": [m for m in HEAVY_MODULES if m in loaded],
+    }
+
+
+def measure_median(module: str, runs: int, cwd: str = ".") -> Dict:
+    """Summarize ``runs`` fresh imports and return the median one."""
+    summaries = sorted(
+        (summarize(measure(module, cwd)) for _ in range(max(runs, 1))),
+        key=lambda s: s["total_us"],
+    )
+    median = summaries[len(summaries) // 2]
+    median["range_us"] = (summaries[0]["total_us"], summaries[-1]["total_us"])
+    return median
+
+
+def print_report(title: str, summary: Dict, top: int):
+    low, high = summary["range_us"]
+    print(f"== {title}")
+    print(
+        f"total import time: {summary['total_us'] / 1000:.1f} ms "
+        f"(median; {low / 1000:.1f}-{high / 1000:.1f} ms)"
+    )
+    print(f"heavy modules loaded: {', '.join(summary['heavy']) or 'none'}")
+    ranked = sorted(summary["packages"].items(), key=lambda kv: kv[1], reverse=True)
+    for name, self_us in ranked[:top]:
+        print(f"  {self_us / 1000:8.1f} ms  {name}")
+
+
+@contextmanager
+def checkout(ref: str) -> Iterator[str]:
+    """Export ``ref`` into a temporary directory, removed afterwards."""
+    with tempfile.TemporaryDirectory(prefix="importtime-") as path:
+        archive = subprocess.run(
+            ["git", "archive", ref], capture_output=True, check=True
+        ).stdout
+        subprocess.run(["tar", "-x", "-C", path], input=archive, check=True)
+        if os.path.exists(".env"):
+            with open(".env", "rb") as src, open(
+                os.path.join(path, ".env"), "wb"
+            ) as dst:
+                dst.write(src.read())
+        yield path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--runs", type=int, default=5, help="imports per side")
+    parser.add_argument("--compare", metavar="GIT_REF")
+    args = parser.parse_args()
+
+    current = measure_median(args.module, args.runs)
+    if args.compare:
+        with checkout(args.compare) as path:
+            baseline = measure_median(args.module, args.runs, cwd=path)
+        print_report(f"{args.compare}", baseline, args.top)
+        print()
+        print_report("working tree", current, args.top)
+        delta = (current["total_us"] - baseline["total_us"]) / 1000
+        print()
+        print(f"difference: {delta:+.1f} ms")
+    else:
+        print_report("working tree", current, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Online migration of review references from strings to ObjectIds.
+
+``reviews.product_id`` and ``reviews.reviewer_id`` used to be stored as
+strings. New writes store ObjectIds and, while ``REVIEW_REFS_DUAL_READ`` is
+on, reads match both forms. This converts the remaining string references in
+throttled ``_id``-ordered batches; it is idempotent and can be stopped and
+re-run at any time:
+    python -m scripts.migrate_review_refs --batch-size 1000 --delay 0.05
+
+Once it reports no remaining string references, set
+``REVIEW_REFS_DUAL_READ=false`` so queries use the ObjectId only.
+"""
+
+import argparse
+import asyncio
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+FIELDS = ("product_id", "reviewer_id")
+
+
+def convert(doc: dict) -> dict:
+    """Return the ``$set`` converting a review's string references."""
+    changes = {}
+    for field in FIELDS:
+        value = doc.get(field)
+        if isinstance(value, str) and ObjectId.is_valid(value):
+            changes[field] = ObjectId(value)
+    return changes
+
+
+async def migrate(args):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    from app.core.config import get_settings
+
+    settings = get_settings()
+    client = AsyncIOMotorClient(settings.mongodb_uri)
+    reviews = client[settings.database_name]["reviews"]
+
+    string_refs = {"$or": [{field: {"$type": "string"}} for field in FIELDS]}
+    last_id = None
+    converted = 0
+    while True:
+        query = dict(string_refs)
+        if last_id is not None:
+            query = {"$and": [string_refs, {"_id": {"$gt": last_id}}]}
+        docs = (
+            await reviews.find(query, {field: 1 for field in FIELDS})
+            .sort("_id", 1)
+            .limit(args.batch_size)
+            .to_list(length=args.batch_size)
+        )
+        if not docs:
+            break
+
+        operations = []
+        for doc in docs:
+            changes = convert(doc)
+            if changes:
+                # Only rewrite if the value is still the string we read.
+                match = {"_id": doc["_id"]}
+                match.update({field: doc[field] for field in changes})
+                operations.append(UpdateOne(match, {"$set": changes}))
+        if operations:
+            result = await reviews.bulk_write(operations, ordered=False)
+            converted += result.modified_count
+
+        last_id = docs[-1]["_id"]
+        print(f"converted {converted} reviews (last _id {last_id})")
+        await asyncio.sleep(args.delay)
+
+    remaining = await reviews.count_documents(string_refs)
+    print(f"done: {converted} converted, {remaining} string references remaining")
+    client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--delay", type=float, default=0.05, help="seconds between batches")
+    args = parser.parse_args()
+    asyncio.run(migrate(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""Rebuild the top-rated leaderboard from raw reviews.
+
+Run once after upgrading an existing catalog (entries are otherwise only
+written when a product's rating changes), or whenever the scoring settings
+change:
+    python -m scripts.rebuild_leaderboard
+"""
+
+import asyncio
+
+
+async def rebuild():
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    from app.core.config import get_settings
+    from app.services.leaderboard_service import LeaderboardService
+
+    settings = get_settings()
+    client = AsyncIOMotorClient(settings.mongodb_uri)
+    service = LeaderboardService(client[settings.database_name])
+    await service.ensure_indexes()
+    await service.rebuild()
+    client.close()
+    print("Rebuilt the leaderboard")
+
+
+if __name__ == "__main__":
+    asyncio.run(rebuild())
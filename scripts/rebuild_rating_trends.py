@@ -0,0 +1,33 @@
+"""Regenerate the per-product daily rating rollups from raw reviews.
+
+    python -m scripts.rebuild_rating_trends               # every product
+    python -m scripts.rebuild_rating_trends --product ID  # one product
+"""
+
+import argparse
+import asyncio
+
+
+async def rebuild(args):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    from app.core.config import get_settings
+    from app.services.rating_trend_service import RatingTrendService
+
+    settings = get_settings()
+    client = AsyncIOMotorClient(settings.mongodb_uri)
+    service = RatingTrendService(client[settings.database_name])
+    await service.ensure_indexes()
+    await service.rebuild(args.product)
+    client.close()
+    print("Rebuilt rating rollups" + (f" for {args.product}" if args.product else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--product", help="only rebuild this product id")
+    asyncio.run(rebuild(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""Replay a captured traffic trace against the ASGI app and compare runs.
+
+Run a trace (in-process, against the MongoDB configured in ``.env``):
+    python -m scripts.replay_traffic run captures/traffic.jsonl \\
+        --email bench@example.com --password secret123 --speed 2 --out new.json
+
+Compare two runs, e.g. one made on the old checkout and one on the new one:
+    python -m scripts.replay_traffic compare old.json new.json
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import statistics
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+
+def load_trace(path: str) -> List[dict]:
+    """Load a capture, including rotated files (``traffic.jsonl.1`` ...)."""
+    entries = []
+    for name in sorted(glob.glob(path + "*")):
+        with open(name) as f:
+            entries.extend(json.loads(line) for line in f if line.strip())
+    entries.sort(key=lambda e: e["ts"])
+    return entries
+
+
+def body_from_shape(shape, credentials: dict):
+    """Build a request body with placeholder values matching a captured shape."""
+    if isinstance(shape, dict):
+        return {
+            k: credentials[k] if k in credentials else body_from_shape(v, credentials)
+            for k, v in shape.items()
+        }
+    if isinstance(shape, list):
+        return [body_from_shape(v, credentials) for v in shape]
+    return {"str": "replay", "int": 1, "float": 1.0, "bool": True}.get(shape)
+
+
+async def replay(args) -> Dict[str, List[float]]:
+    import httpx
+
+    from app.core.config import get_settings
+    from app.main import app
+
+    settings = get_settings()
+    # SSE streams never finish through ASGITransport; they'd hang the run.
+    trace = [e for e in load_trace(args.trace) if not e["path"].endswith("/stream")]
+    if args.limit:
+        trace = trace[: args.limit]
+    credentials = {"email": args.email, "password": args.password}
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+
+    async with app.router.lifespan_context(app):
+        from app.db.warmup import readiness
+
+        while not readiness.ready:
+            await asyncio.sleep(0.1)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://replay"
+        ) as client:
+            resp = await client.post(
+                f"{settings.api_v1_prefix}/login", json=credentials
+            )
+            resp.raise_for_status()
+            headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+            async def send(entry: dict):
+                key = f"{entry['method']} {entry['route'] or entry['path']}"
+                body = None
+                if entry.get("body_shape") not in (None, "non-json"):
+                    body = body_from_shape(entry["body_shape"], credentials)
+                started = time.perf_counter()
+                try:
+                    response = await asyncio.wait_for(
+                        client.request(
+                            entry["method"],
+                            entry["path"],
+                            params=[p for p in entry["params"] if p[1] != "<redacted>"],
+                            json=body,
+                            headers=headers,
+                        ),
+                        timeout=args.timeout,
+                    )
+                except asyncio.TimeoutError:
+                    errors[key] += 1
+                    return
+                latencies[key].append((time.perf_counter() - started) * 1000)
+                if response.status_code >= 500:
+                    errors[key] += 1
+
+            origin = trace[0]["ts"] if trace else 0
+            start = time.monotonic()
+            tasks = []
+            for entry in trace:
+                delay = (entry["ts"] - origin) / args.speed - (time.monotonic() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                tasks.append(asyncio.create_task(send(entry)))
+            await asyncio.gather(*tasks)
+
+    return {
+        route: {
+            "latencies_ms": latencies.get(route, []),
+            "errors": errors.get(route, 0),
+        }
+        for route in set(latencies) | set(errors)
+    }
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summarize(results: dict) -> Dict[str, dict]:
+    return {
+        route: {
+            "count": len(data["latencies_ms"]),
+            "errors": data["errors"],
+            "p50": statistics.median(data["latencies_ms"]),
+            "p95": percentile(data["latencies_ms"], 0.95),
+        }
+        for route, data in results.items()
+        if data["latencies_ms"]
+    }
+
+
+def print_summary(summary: Dict[str, dict]):
+    print(f"{'route':50} {'count':>7} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9}")
+    for route, s in sorted(summary.items()):
+        print(
+            f"{route:50} {s['count']:7d} {s['errors']:7d} "
+            f"{s['p50']:9.1f} {s['p95']:9.1f}"
+        )
+
+
+def compare(old_path: str, new_path: str):
+    with open(old_path) as f:
+        old = summarize(json.load(f))
+    with open(new_path) as f:
+        new = summarize(json.load(f))
+
+    print(
+        f"{'route':50} {'p50 old':>9} {'p50 new':>9} {'Δp50':>8} "
+        f"{'p95 old':>9} {'p95 new':>9} {'Δp95':>8}"
+    )
+    for route in sorted(set(old) | set(new)):
+        a, b = old.get(route), new.get(route)
+        if not a or not b:
+            print(f"{route:50} only in {'new' if b else 'old'} run")
+            continue
+        d50 = (b["p50"] - a["p50"]) / a["p50"] * 100 if a["p50"] else 0.0
+        d95 = (b["p95"] - a["p95"]) / a["p95"] * 100 if a["p95"] else 0.0
+        print(
+            f"{route:50} {a['p50']:9.1f} {b['p50']:9.1f} {d50:+7.1f}% "
+            f"{a['p95']:9.1f} {b['p95']:9.1f} {d95:+7.1f}%"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="replay a trace against the app")
+    run_parser.add_argument("trace", help="capture file (rotated files included)")
+    run_parser.add_argument("--email", required=True)
+    run_parser.add_argument("--password", required=True)
+    run_parser.add_argument(
+        "--speed", type=float, default=1.0, help="rate multiplier (2 = twice as fast)"
+    )
+    run_parser.add_argument("--limit", type=int, help="replay only the first N entries")
+    run_parser.add_argument(
+        "--timeout", type=float, default=30.0, help="per-request timeout in seconds"
+    )
+    run_parser.add_argument("--out", help="write raw latencies to this JSON file")
+
+    compare_parser = sub.add_parser("compare", help="compare two run outputs")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+
+    args = parser.parse_args()
+    if args.command == "compare":
+        compare(args.old, args.new)
+        return
+
+    results = asyncio.run(replay(args))
+    print_summary(summarize(results))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f)
+
+
+if __name__ == "__main__":
+    main()
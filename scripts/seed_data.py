@@ -0,0 +1,262 @@
+"""Generate a deterministic, skewed synthetic dataset for scale testing.
+
+Example (10M reviews):
+    python -m scripts.seed_data --users 200000 --products 100000 \\
+        --reviews 10000000 --tokens 500000 --seed 42 --drop
+
+All users share the password given by ``--password`` (hashed once with
+bcrypt and reused), so any seeded account can log in. Output is a pure
+function of ``--seed`` and ``--now``, ObjectIds included.
+"""
+
+import argparse
+import asyncio
+import bisect
+import math
+import random
+import struct
+import time
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from typing import Iterator, List
+
+from bson import ObjectId
+
+CATEGORIES = [
+    "electronics", "books", "fashion", "home", "sports", "beauty",
+    "toys", "grocery", "automotive", "garden", "music", "health",
+]
+COMMENTS = [
+    "Great product", "Works as expected", "Not bad for the price",
+    "Would buy again", "Disappointed", "Arrived late but fine",
+    "Excellent quality", "Average", "Too expensive", "Highly recommended",
+]
+# Ratings skew positive, like most review sites.
+RATING_WEIGHTS = [0.05, 0.07, 0.13, 0.30, 0.45]
+
+
+class Generator:
+    """Deterministic document generator driven by a single seed."""
+
+    def __init__(self, seed: int, now: datetime):
+        self.rng = random.Random(seed)
+        self.now = now
+
+    def object_id(self, at: datetime) -> ObjectId:
+        """ObjectId with the given timestamp and seeded random tail."""
+        return ObjectId(struct.pack(">I", int(at.timestamp())) + self.rng.randbytes(8))
+
+    def past(self, days: int) -> datetime:
+        return self.now - timedelta(seconds=self.rng.randint(0, days * 86400))
+
+    def users(self, count: int, hashed_password: str) -> Iterator[dict]:
+        for i in range(count):
+            created = self.past(730)
+            yield {
+                "_id": self.object_id(created),
+                "email": f"user{i}@example.com",
+                "name": f"User {i}",
+                "hashed_password": hashed_password,
+                "createdAt": created,
+                "updatedAt": created,
+            }
+
+    def products(self, count: int) -> Iterator[dict]:
+        for i in range(count):
+            created = self.past(730)
+            yield {
+                "_id": self.object_id(created),
+                "name": f"Product {i}",
+                "description": f"Synthetic product {i}",
+                # Log-normal prices: many cheap items, a long expensive tail.
+                "price": int(math.exp(self.rng.gauss(11.5, 1.2))),
+                "stock": self.rng.randint(0, 500),
+                "category": self.rng.choice(CATEGORIES),
+                "average_rating": 0,
+                "createdAt": created,
+                "updatedAt": created,
+            }
+
+    def reviews(
+        self, count: int, products: List[dict], users: List[dict], zipf_s: float
+    ) -> Iterator[dict]:
+        # Zipf: the product of rank k gets weight 1 / k**s.
+        cumulative = list(
+            accumulate(1 / (k**zipf_s) for k in range(1, len(products) + 1))
+        )
+        total = cumulative[-1]
+        for _ in range(count):
+            rank = bisect.bisect_left(cumulative, self.rng.random() * total)
+            product = products[min(rank, len(products) - 1)]
+            user = users[self.rng.randrange(len(users))]
+            created = self.past(365)
+            yield {
+                "_id": self.object_id(created),
+                "product_id": product["_id"],
+                "product_name": product["name"],
+                "reviewer_id": user["_id"],
+                "reviewer_name": user["name"],
+                "rating": self.rng.choices(range(1, 6), RATING_WEIGHTS)[0],
+                "comment": self.rng.choice(COMMENTS),
+                "createdAt": created,
+                "updatedAt": created,
+            }
+
+    def tokens(self, count: int, users: List[dict]) -> Iterator[dict]:
+        for _ in range(count):
+            user = users[self.rng.randrange(len(users))]
+            created = self.past(30)
+            expires = created + timedelta(days=7)
+            roll = self.rng.random()
+            revoked = None
+            if roll < 0.5:
+                revoked = created + timedelta(seconds=self.rng.randint(60, 6 * 86400))
+            yield {
+                "_id": self.object_id(created),
+                "token": self.rng.randbytes(32).hex(),
+                "user_id": str(user["_id"]),
+                "expires_at": expires,
+                "created_at": created,
+                "revoked_at": revoked,
+            }
+
+
+def batches(docs: Iterator[dict], size: int) -> Iterator[List[dict]]:
+    batch = []
+    for doc in docs:
+        batch.append(doc)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def insert_all(collection, docs: Iterator[dict], batch_size: int, concurrency: int):
+    """Insert documents with up to ``concurrency`` unordered insert_many calls in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    inserted = 0
+    started = time.monotonic()
+    tasks = []
+
+    async def insert(batch: List[dict]):
+        nonlocal inserted
+        try:
+            await collection.insert_many(batch, ordered=False)
+            inserted += len(batch)
+        finally:
+            semaphore.release()
+
+    for batch in batches(docs, batch_size):
+        await semaphore.acquire()
+        tasks.append(asyncio.create_task(insert(batch)))
+    # Every task, so a failed batch fails the seed instead of vanishing.
+    await asyncio.gather(*tasks)
+
+    elapsed = time.monotonic() - started
+    print(f"  {collection.name}: {inserted} docs in {elapsed:.1f}s "
+          f"({inserted / max(elapsed, 1e-9):.0f}/s)")
+
+
+async def recompute_ratings(db):
+    """Set average_rating on every product from its reviews in one server-side pass."""
+    pipeline = [
+        {"$match": {"rating": {"$ne": None}}},
+        {"$group": {"_id": {"$toObjectId": "$product_id"}, "avg": {"$avg": "$rating"}}},
+        {"$project": {"average_rating": {"$round": ["$avg", 1]}}},
+        {
+            "$merge": {
+                "into": "products",
+                "on": "_id",
+                "whenMatched": "merge",
+                "whenNotMatched": "discard",
+            }
+        },
+    ]
+    await db["reviews"].aggregate(pipeline, allowDiskUse=True).to_list(length=None)
+
+
+async def seed(args):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    from app.core.config import get_settings
+    from app.db.indexes import ensure_indexes
+    from app.services.auth_service import AuthService
+    from app.services.facet_service import FacetService
+    from app.services.leaderboard_service import LeaderboardService
+    from app.services.rating_trend_service import RatingTrendService
+    from app.services.similar_product_service import SimilarProductService
+    from scripts.backfill_product_reviews import backfill_products
+
+    settings = get_settings()
+    client = AsyncIOMotorClient(settings.mongodb_uri, maxpoolsize=args.concurrency + 4)
+    db = client[args.database or settings.database_name]
+
+    if args.drop:
+        # Derived collections too, so nothing is left over from the old data.
+        derived = (
+            RatingTrendService.collection_name,
+            LeaderboardService.collection_name,
+            FacetService.collection_name,
+            SimilarProductService.collection_name,
+        )
+        for name in ("users", "products", "reviews", "refresh_tokens", *derived):
+            await db[name].drop()
+    await ensure_indexes(db)
+
+    now = datetime.fromisoformat(args.now).replace(tzinfo=timezone.utc)
+    gen = Generator(args.seed, now)
+    hashed_password = AuthService.get_password_hash(args.password)
+
+    print("Seeding:")
+    users = list(gen.users(args.users, hashed_password))
+    await insert_all(db["users"], iter(users), args.batch_size, args.concurrency)
+    products = list(gen.products(args.products))
+    await insert_all(db["products"], iter(products), args.batch_size, args.concurrency)
+
+    # Keep only what reviews/tokens need so memory stays flat for 10M reviews.
+    users = [{"_id": u["_id"], "name": u["name"]} for u in users]
+    products = [{"_id": p["_id"], "name": p["name"]} for p in products]
+    await insert_all(
+        db["reviews"],
+        gen.reviews(args.reviews, products, users, args.zipf),
+        args.batch_size,
+        args.concurrency,
+    )
+    await insert_all(
+        db["refresh_tokens"], gen.tokens(args.tokens, users), args.batch_size, args.concurrency
+    )
+
+    print("Recomputing ratings, embedded reviews, rollups, leaderboard and facets...")
+    await recompute_ratings(db)
+    await backfill_products(db, settings.product_recent_reviews)
+    await RatingTrendService(db).rebuild()
+    await LeaderboardService(db).rebuild()
+    await FacetService(db).rebuild()
+    client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--reviews", type=int, default=100000)
+    parser.add_argument("--tokens", type=int, default=20000)
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent for reviews per product")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--now",
+        default=datetime.now(timezone.utc).date().isoformat(),
+        help="reference date for timestamps (pass it to reproduce a dataset exactly)",
+    )
+    parser.add_argument("--password", default="password123")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--database", help="defaults to DATABASE_NAME")
+    parser.add_argument("--drop", action="store_true", help="drop the seeded collections first")
+    args = parser.parse_args()
+    asyncio.run(seed(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+"""Export and import collections between environments.
+
+Export streams each collection through parallel ``_id``-range cursors into
+compressed NDJSON (Extended JSON, types preserved) or raw BSON files plus a
+``manifest.json``:
+    python -m scripts.transfer_data export dump/ --format bson --partitions 8
+
+Import re-inserts them with concurrent unordered ``insert_many`` calls
+(documents whose ``_id`` already exists are skipped), then recomputes
+average ratings, embeds and facets for the products that changed only, and
+rebuilds the rating rollups once:
+    python -m scripts.transfer_data import dump/ --concurrency 8 --drop
+
+Derived collections (facets, leaderboards, rollups, similar products) are
+rebuilt rather than transferred. Embedded recent reviews and rating
+histograms are copied with their products and refreshed for every product
+that received imported reviews.
+"""
+
+import argparse
+import asyncio
+import gzip
+import io
+import itertools
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import List, Set, Tuple
+
+import bson
+from bson import ObjectId, json_util
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+
+COLLECTIONS = ["users", "products", "reviews"]
+RAW_OPTIONS = CodecOptions(document_class=RawBSONDocument)
+JSON_OPTIONS = json_util.CANONICAL_JSON_OPTIONS
+DUPLICATE_KEY = 11000
+
+
+def open_output(path: str, compression: str):
+    if compression == "gzip":
+        return gzip.open(path, "wb", compresslevel=6)
+    if compression == "zstd":
+        import zstandard
+
+        return zstandard.ZstdCompressor(level=3).stream_writer(open(path, "wb"))
+    return open(path, "wb")
+
+
+def open_input(path: str, compression: str):
+    if compression == "gzip":
+        return gzip.open(path, "rb")
+    if compression == "zstd":
+        import zstandard
+
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"))
+        return io.BufferedReader(reader)
+    return open(path, "rb")
+
+
+def file_name(collection: str, partition: int, fmt: str, compression: str) -> str:
+    suffix = {"gzip": ".gz", "zstd": ".zst", "none": ""}[compression]
+    return f"{collection}.{partition:03d}.{fmt}{suffix}"
+
+
+def write_batch(out, docs: list, fmt: str):
+    if fmt == "bson":
+        out.write(b"".join(doc.raw for doc in docs))
+    else:
+        out.write(
+            b"".join(
+                json_util.dumps(doc, json_options=JSON_OPTIONS).encode() + b"\n"
+                for doc in docs
+            )
+        )
+
+
+def read_docs(f, fmt: str):
+    if fmt == "bson":
+        # RawBSONDocuments are inserted as is, without decoding and re-encoding.
+        yield from bson.decode_file_iter(f, codec_options=RAW_OPTIONS)
+    else:
+        for line in f:
+            if line.strip():
+                yield json_util.loads(line, json_options=JSON_OPTIONS)
+
+
+def read_batch(docs, size: int) -> list:
+    return list(itertools.islice(docs, size))
+
+
+async def partition_filters(collection, partitions: int) -> List[dict]:
+    """Split a collection into ``_id`` ranges using a random sample.
+
+    Ranges are only used for ObjectId keys; anything else (or a small
+    collection) is exported with a single cursor.
+    """
+    count = await collection.estimated_document_count()
+    if partitions <= 1 or count < partitions * 1000:
+        return [{}]
+    sample = await collection.aggregate(
+        [{"$sample": {"size": partitions * 32}}, {"$project": {"_id": 1}}]
+    ).to_list(length=None)
+    ids = sorted({doc["_id"] for doc in sample if isinstance(doc["_id"], ObjectId)})
+    if len(ids) < len(sample) or len(ids) < partitions:
+        return [{}]
+
+    step = len(ids) / partitions
+    splits = sorted({ids[int(i * step)] for i in range(1, partitions)})
+    bounds = [None] + splits + [None]
+    filters = []
+    for lower, upper in zip(bounds, bounds[1:]):
+        id_range = {"$type": "objectId"}
+        if lower is not None:
+            id_range["$gte"] = lower
+        if upper is not None:
+            id_range["$lt"] = upper
+        filters.append({"_id": id_range})
+    # Keys of any other type that were missed by the sample.
+    filters.append({"_id": {"$not": {"$type": "objectId"}}})
+    return filters
+
+
+async def export_partition(collection, query: dict, path: str, args) -> int:
+    out = await asyncio.to_thread(open_output, path, args.compression)
+    exported = 0
+    try:
+        cursor = collection.find(query).sort("_id", 1).batch_size(args.batch_size)
+        while True:
+            docs = await cursor.to_list(length=args.batch_size)
+            if not docs:
+                break
+            await asyncio.to_thread(write_batch, out, docs, args.format)
+            exported += len(docs)
+    finally:
+        await asyncio.to_thread(out.close)
+    return exported
+
+
+async def export(args):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    from app.core.config import get_settings
+
+    settings = get_settings()
+    client = AsyncIOMotorClient(settings.mongodb_uri, maxpoolsize=args.partitions + 4)
+    db = client[args.database or settings.database_name]
+    os.makedirs(args.directory, exist_ok=True)
+
+    manifest = {
+        "format": args.format,
+        "compression": args.compression,
+        "exported_at": datetime.now(timezone.utc).isoformat(),
+        "collections": {},
+    }
+    for name in args.collections:
+        collection = db[name]
+        if args.format == "bson":
+            collection = collection.with_options(codec_options=RAW_OPTIONS)
+        started = time.monotonic()
+        filters = await partition_filters(collection, args.partitions)
+        files = [
+            file_name(name, i, args.format, args.compression)
+            for i in range(len(filters))
+        ]
+        counts = await asyncio.gather(
+            *(
+                export_partition(
+                    collection, query, os.path.join(args.directory, file), args
+                )
+                for query, file in zip(filters, files)
+            )
+        )
+        manifest["collections"][name] = {"files": files, "count": sum(counts)}
+        print(f"  {name}: {sum(counts)} docs in {len(files)} files "
+              f"({time.monotonic() - started:.1f}s)")
+
+    with open(os.path.join(args.directory, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    client.close()
+
+
+async def insert_batch(collection, batch: list) -> list:
+    """Insert a batch unordered and return the documents actually inserted."""
+    from pymongo.errors import BulkWriteError
+
+    try:
+        await collection.insert_many(batch, ordered=False)
+        return batch
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if any(error.get("code") != DUPLICATE_KEY for error in errors):
+            raise
+        skipped = {error["index"] for error in errors}
+        return [doc for i, doc in enumerate(batch) if i not in skipped]
+
+
+class ImportChanges:
+    """Products and reviewers touched by an import."""
+
+    def __init__(self):
+        self.products: Set[str] = set()
+        self.reviewers: Set[str] = set()
+        self.products_inserted = False
+
+    def add(self, collection: str, docs: list):
+        if collection == "products":
+            self.products.update(str(doc["_id"]) for doc in docs)
+            self.products_inserted = self.products_inserted or bool(docs)
+        elif collection == "reviews":
+            for doc in docs:
+                if doc.get("product_id") is not None:
+                    self.products.add(str(doc["product_id"]))
+                if doc.get("reviewer_id") is not None:
+                    self.reviewers.add(str(doc["reviewer_id"]))
+
+
+async def import_file(
+    collection, path: str, manifest: dict, args, semaphore, changes: ImportChanges
+) -> Tuple[int, int]:
+    """Stream one export file into ``collection``; returns (read, inserted)."""
+    f = await asyncio.to_thread(open_input, path, manifest["compression"])
+    docs = read_docs(f, manifest["format"])
+    read = inserted = 0
+    tasks = []
+
+    async def insert(batch: list):
+        nonlocal inserted
+        try:
+            done = await insert_batch(collection, batch)
+            inserted += len(done)
+            changes.add(collection.name, done)
+        finally:
+            semaphore.release()
+
+    try:
+        while True:
+            batch = await asyncio.to_thread(read_batch, docs, args.batch_size)
+            if not batch:
+                break
+            read += len(batch)
+            await semaphore.acquire()
+            tasks.append(asyncio.create_task(insert(batch)))
+        # Every task, so a failed batch fails the import instead of vanishing.
+        await asyncio.gather(*tasks)
+    finally:
+        await asyncio.to_thread(f.close)
+    return read, inserted
+
+
+async def recompute(db, changes: ImportChanges, concurrency: int):
+    """Refresh ratings, rollups, embeds, facets and review counts touched by the import.
+
+    Average ratings go through ``ReviewService`` so leaderboard entries
+    (rating and review count) follow; recent reviews and rating histograms
+    on the products are rebuilt with the backfill aggregation, and rating
+    rollups with one rebuild.
+    """
+    from app.core.config import get_settings
+    from app.services.facet_service import FacetService
+    from app.services.rating_trend_service import RatingTrendService
+    from app.services.review_service import ReviewService
+    from scripts.backfill_product_reviews import backfill_products
+
+    service = ReviewService(db)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def refresh(product_id: str):
+        async with semaphore:
+            await service.update_product_average_rating(product_id)
+
+    product_ids = [p for p in changes.products if ObjectId.is_valid(p)]
+    await asyncio.gather(*(refresh(product_id) for product_id in product_ids))
+    print(f"  recomputed ratings for {len(product_ids)} products")
+
+    await backfill_products(db, get_settings().product_recent_reviews, product_ids)
+    print(f"  refreshed recent reviews for {len(product_ids)} products")
+    if product_ids:
+        await RatingTrendService(db).rebuild()
+        print("  rebuilt rating rollups")
+
+    # Cached review counts are recomputed on the next read.
+    reviewer_ids = [ObjectId(r) for r in changes.reviewers if ObjectId.is_valid(r)]
+    for i in range(0, len(reviewer_ids), 10000):
+        await db["users"].update_many(
+            {"_id": {"$in": reviewer_ids[i : i + 10000]}},
+            {"$unset": {"review_count": ""}},
+        )
+    if changes.products_inserted:
+        await FacetService(db).rebuild()
+
+
+async def import_(args):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    from app.core.config import get_settings
+    from app.db.indexes import ensure_indexes
+
+    with open(os.path.join(args.directory, "manifest.json")) as f:
+        manifest = json.load(f)
+
+    settings = get_settings()
+    client = AsyncIOMotorClient(settings.mongodb_uri, maxpoolsize=args.concurrency + 4)
+    db = client[args.database or settings.database_name]
+    names = args.collections or list(manifest["collections"])
+
+    if args.drop:
+        for name in names:
+            await db[name].drop()
+    await ensure_indexes(db)
+
+    changes = ImportChanges()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    for name in names:
+        collection = db[name]
+        started = time.monotonic()
+        results = await asyncio.gather(
+            *(
+                import_file(
+                    collection,
+                    os.path.join(args.directory, file),
+                    manifest,
+                    args,
+                    semaphore,
+                    changes,
+                )
+                for file in manifest["collections"][name]["files"]
+            )
+        )
+        read = sum(r for r, _ in results)
+        inserted = sum(i for _, i in results)
+        print(f"  {name}: {inserted} inserted, {read - inserted} already present "
+              f"({time.monotonic() - started:.1f}s)")
+
+    await recompute(db, changes, args.concurrency)
+    client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = sub.add_parser("export", help="write collections to a directory")
+    export_parser.add_argument("directory")
+    export_parser.add_argument("--collections", nargs="+", default=COLLECTIONS)
+    export_parser.add_argument("--format", choices=["ndjson", "bson"], default="ndjson")
+    export_parser.add_argument(
+        "--compression", choices=["gzip", "zstd", "none"], default="gzip"
+    )
+    export_parser.add_argument("--partitions", type=int, default=4, help="parallel _id ranges")
+    export_parser.add_argument("--batch-size", type=int, default=5000)
+    export_parser.add_argument("--database", help="defaults to DATABASE_NAME")
+
+    import_parser = sub.add_parser("import", help="load an export directory")
+    import_parser.add_argument("directory")
+    import_parser.add_argument("--collections", nargs="+", help="defaults to all exported")
+    import_parser.add_argument("--batch-size", type=int, default=5000)
+    import_parser.add_argument("--concurrency", type=int, default=8)
+    import_parser.add_argument("--database", help="defaults to DATABASE_NAME")
+    import_parser.add_argument("--drop", action="store_true", help="drop the collections first")
+
+    args = parser.parse_args()
+    asyncio.run(export(args) if args.command == "export" else import_(args))
+
+
+if __name__ == "__main__":
+    main()
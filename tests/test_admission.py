@@ -0,0 +1,33 @@
+from app.core.config import get_settings
+from app.main import app
+from app.middleware.admission import create_admission_controller
+
+
+def classify(method: str, path: str) -> str:
+    return create_admission_controller(get_settings()).classify(method, path)
+
+
+def test_login_route_uses_login_budget():
+    assert classify("POST", app.url_path_for("login")) == "login"
+
+
+def test_list_routes_use_list_budget():
+    for path in (
+        app.url_path_for("list_products"),
+        app.url_path_for("list_reviews"),
+        app.url_path_for("list_users"),
+        app.url_path_for("get_product_review", product_id="p1"),
+        app.url_path_for("get_my_reviews"),
+    ):
+        assert classify("GET", path) == "list", path
+
+
+def test_stream_route_uses_stream_budget():
+    path = app.url_path_for("stream_product_reviews", product_id="p1")
+    assert classify("GET", path) == "stream"
+
+
+def test_other_routes_use_default_budget():
+    assert classify("GET", app.url_path_for("get_product", product_id="p1")) == "default"
+    assert classify("POST", app.url_path_for("create_review", product_id="p1")) == "default"
+    assert classify("GET", app.url_path_for("get_me")) == "default"
@@ -0,0 +1,11 @@
+from app.middleware.idempotency import _is_final
+
+
+def test_success_and_permanent_client_errors_are_final():
+    for status_code in (200, 201, 204, 400, 401, 404, 422):
+        assert _is_final(status_code), status_code
+
+
+def test_transient_and_server_errors_are_not_final():
+    for status_code in (408, 409, 425, 429, 499, 500, 503, 504):
+        assert not _is_final(status_code), status_code
@@ -0,0 +1,73 @@
+import asyncio
+
+from bson import ObjectId
+
+from app.services.product_service import ProductService
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+        self.order = None
+        self.max_docs = None
+
+    def sort(self, order):
+        self.order = order
+        return self
+
+    def limit(self, count):
+        self.max_docs = count
+        return self
+
+    def hint(self, index):
+        return self
+
+    async def to_list(self, length):
+        return self.docs[: min(length, self.max_docs)]
+
+
+class FakeCollection:
+    def __init__(self, docs=()):
+        self.docs = list(docs)
+        self.queries = []
+        self.cursor = None
+
+    def find(self, query, projection=None):
+        self.queries.append(query)
+        self.cursor = FakeCursor(self.docs)
+        return self.cursor
+
+
+def list_products(collection, **filters):
+    service = ProductService({"products": collection})
+    return asyncio.run(service.list_products(**filters))
+
+
+def test_category_filter_is_an_exact_match():
+    products = FakeCollection()
+
+    list_products(products, category=["Books"])
+    list_products(products, category=["Books", "Music"])
+
+    # No substring or case-insensitive regex, unlike before the filter planner.
+    assert products.queries == [
+        {"category": "Books"},
+        {"category": {"$in": ["Books", "Music"]}},
+    ]
+
+
+def test_list_is_keyset_paginated():
+    docs = [{"_id": ObjectId(), "name": f"Product {i}"} for i in range(3)]
+    products = FakeCollection(docs)
+
+    page = list_products(products, limit=2)
+
+    assert [p.name for p in page["items"]] == ["Product 0", "Product 1"]
+    assert products.cursor.max_docs == 3
+    assert products.cursor.order == [("_id", 1)]
+
+    list_products(products, category=["Books"], limit=2, cursor=page["next_cursor"])
+
+    assert products.queries[-1] == {
+        "$and": [{"category": "Books"}, {"_id": {"$gt": docs[1]["_id"]}}]
+    }
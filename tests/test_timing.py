@@ -0,0 +1,48 @@
+import json
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.timing import stage
+from app.middleware.timing import RequestLogFormatter, ServerTimingMiddleware
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: str):
+        with stage("handler"):
+            return {"id": item_id}
+
+    app.add_middleware(ServerTimingMiddleware, emit_header=True)
+    return app
+
+
+def test_request_log_has_timing_fields(caplog):
+    with caplog.at_level(logging.INFO, logger="app.requests"):
+        response = TestClient(make_app()).get("/items/42")
+
+    assert response.status_code == 200
+    assert "handler;dur=" in response.headers["Server-Timing"]
+    [record] = [r for r in caplog.records if r.name == "app.requests"]
+    assert record.method == "GET"
+    assert record.path == "/items/{item_id}"
+    assert record.status == 200
+    assert record.handler_ms >= 0
+    assert record.total_ms >= record.handler_ms
+
+
+def test_request_log_formatter_emits_json():
+    record = logging.makeLogRecord(
+        {"name": "app.requests", "levelname": "INFO", "msg": "request"}
+    )
+    record.method, record.status, record.total_ms = "GET", 200, 1.5
+
+    entry = json.loads(RequestLogFormatter().format(record))
+
+    assert entry["message"] == "request"
+    assert entry["method"] == "GET"
+    assert entry["status"] == 200
+    assert entry["total_ms"] == 1.5